@@ -1,4 +1,8 @@
+from decimal import Decimal
+from typing import List, Union
+
 from tortoise import models, fields
+
 from bb.products.models import Product
 
 
@@ -9,42 +13,131 @@ class ShoppingCart(models.Model):
     Атрибуты:
     - user (User): Пользователь, которому принадлежит корзина.
     - products (ManyToManyField[Product]): Товары в корзине.
+    - cached_total (decimal): Поддерживаемая инкрементально общая стоимость товаров в корзине.
+    - items_count (int): Поддерживаемое инкрементально количество товаров в корзине.
+
+    Таблица связи shoppingcart_product имеет составной первичный ключ (shoppingcart_id, product_id),
+    поэтому товар не может попасть в корзину дважды. Уникальный индекс по user_id оставляет пользователю
+    одну корзину.
 
     Методы:
-    - total_price (property): Возвращает общую стоимость товаров в корзине.
-    - add_product(product: Product | List[Product]): Добавляет один товар или список товаров в корзину.
-    - remove_product(product: Product): Асинхронно удаляет товар из корзины.
+    - total_price (property): Возвращает общую стоимость товаров в корзине, посчитанную в БД.
+    - add_product(products: Product | List[Product]): Добавляет один товар или список товаров в корзину.
+    - remove_product(products: Product | List[Product]): Асинхронно удаляет один товар или список товаров из корзины.
     - clear_cart(): Асинхронно очищает корзину.
     """
     user = fields.ForeignKeyField(model_name='models.User', related_name='shopping_cart')
     products = fields.ManyToManyField(model_name='models.Product', related_name='carts')
+    cached_total = fields.DecimalField(max_digits=14, decimal_places=2, default=0)
+    items_count = fields.IntField(default=0)
 
     @property
-    async def total_price(self) -> float:
+    async def total_price(self) -> Decimal:
         """
-        Возвращает общую стоимость товаров в корзине.
+        Возвращает общую стоимость товаров в корзине, посчитанную агрегатом SUM в БД.
         """
-        return sum(await Product.filter(carts=self).values_list('price', flat=True))
+        rows = await self._meta.db.execute_query_dict(
+            """
+            SELECT COALESCE(SUM("product"."price"), 0) AS "total"
+            FROM "shoppingcart_product"
+            JOIN "product" ON "product"."id" = "shoppingcart_product"."product_id"
+            WHERE "shoppingcart_product"."shoppingcart_id" = $1
+            """,
+            [self.id],
+        )
+        return Decimal(rows[0]["total"])
 
-    async def add_product(self, products) -> None:
+    @staticmethod
+    def _product_ids(products: Union[Product, int, List[Union[Product, int]]]) -> List[int]:
+        if not isinstance(products, list):
+            products = [products]
+        return [product.id if isinstance(product, Product) else product for product in products]
+
+    async def add_product(self, products: Union[Product, List[Product]]) -> None:
         """
         Добавляет один товар или список товаров в корзину.
-        """
-        if isinstance(products, Product):
-            products = [products]
 
-        for product in products:
-            if product not in await self.products.all():
-                await self.products.add(product)
+        Уже находящиеся в корзине товары отсекает первичный ключ таблицы связи (ON CONFLICT DO NOTHING),
+        неактивные товары пропускаются. Вставка и пересчет cached_total и items_count выполняются
+        одним запросом независимо от количества товаров.
+        """
+        product_ids = self._product_ids(products)
+        if not product_ids:
+            return
+        await self._meta.db.execute_query(
+            """
+            WITH added AS (
+                INSERT INTO "shoppingcart_product" ("shoppingcart_id", "product_id")
+                SELECT $1, "product"."id" FROM "product"
+                WHERE "product"."id" = ANY($2::int[]) AND "product"."is_active"
+                ON CONFLICT ("shoppingcart_id", "product_id") DO NOTHING
+                RETURNING "product_id"
+            )
+            UPDATE "shoppingcart" SET
+                "cached_total" = "cached_total" + COALESCE(
+                    (SELECT SUM("price") FROM "product" JOIN added ON added."product_id" = "product"."id"), 0
+                ),
+                "items_count" = "items_count" + (SELECT COUNT(*) FROM added)
+            WHERE "id" = $1
+            """,
+            [self.id, product_ids],
+        )
 
-    async def remove_product(self, product: Product) -> None:
+    async def remove_product(self, products: Union[Product, int, List[Union[Product, int]]]) -> None:
         """
-        Асинхронно удаляет товар из корзины.
+        Асинхронно удаляет один товар или список товаров (объекты или id) из корзины одним запросом,
+        пересчитывая cached_total и items_count.
         """
-        await self.products.remove(product)
+        product_ids = self._product_ids(products)
+        if not product_ids:
+            return
+        await self._meta.db.execute_query(
+            """
+            WITH removed AS (
+                DELETE FROM "shoppingcart_product"
+                WHERE "shoppingcart_id" = $1 AND "product_id" = ANY($2::int[])
+                RETURNING "product_id"
+            )
+            UPDATE "shoppingcart" SET
+                "cached_total" = "cached_total" - COALESCE(
+                    (SELECT SUM("price") FROM "product" JOIN removed ON removed."product_id" = "product"."id"), 0
+                ),
+                "items_count" = "items_count" - (SELECT COUNT(*) FROM removed)
+            WHERE "id" = $1
+            """,
+            [self.id, product_ids],
+        )
 
     async def clear_cart(self) -> None:
         """
-        Асинхронно очищает корзину.
+        Асинхронно очищает корзину и обнуляет cached_total и items_count.
+        """
+        await self._meta.db.execute_query(
+            """
+            WITH removed AS (
+                DELETE FROM "shoppingcart_product" WHERE "shoppingcart_id" = $1
+            )
+            UPDATE "shoppingcart" SET "cached_total" = 0, "items_count" = 0 WHERE "id" = $1
+            """,
+            [self.id],
+        )
+
+    async def refresh_totals(self) -> None:
+        """
+        Пересчитывает cached_total и items_count по содержимому корзины.
         """
-        await self.products.clear()
+        await self._meta.db.execute_query(
+            """
+            UPDATE "shoppingcart" SET
+                "cached_total" = COALESCE(totals.total, 0),
+                "items_count" = totals.count
+            FROM (
+                SELECT SUM("product"."price") AS total, COUNT("product"."id") AS count
+                FROM "shoppingcart_product"
+                JOIN "product" ON "product"."id" = "shoppingcart_product"."product_id"
+                WHERE "shoppingcart_product"."shoppingcart_id" = $1
+            ) AS totals
+            WHERE "shoppingcart"."id" = $1
+            """,
+            [self.id],
+        )
@@ -0,0 +1,59 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from bb.cart.schemas import CartProductsSchema, CartRetrieveSchema, CartSummarySchema
+from bb.cart.services import CartService, ProductsNotFoundError
+from bb.security.auth import get_current_user
+
+cart_router = APIRouter()
+
+
+@cart_router.get("", response_model=CartRetrieveSchema)
+async def get_cart(current_user=Depends(get_current_user)):
+    """
+    Просмотр корзины текущего пользователя.
+    """
+    cart = await CartService.get_cart(current_user.id)
+    return await CartService.get_cart_view(cart)
+
+
+@cart_router.get("/summary", response_model=CartSummarySchema)
+async def get_cart_summary(current_user=Depends(get_current_user)):
+    """
+    Общая стоимость и количество товаров в корзине без списка товаров.
+    """
+    cart = await CartService.get_cart(current_user.id)
+    return await CartService.get_cart_summary(cart)
+
+
+@cart_router.post("/products", response_model=CartRetrieveSchema)
+async def add_products(cart_data: CartProductsSchema, current_user=Depends(get_current_user)):
+    """
+    Добавление нескольких активных товаров в корзину. Уже лежащие в корзине товары пропускаются.
+    """
+    try:
+        cart = await CartService.add_products(current_user.id, cart_data.product_ids)
+    except ProductsNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"message": str(e), "product_ids": e.product_ids})
+    return await CartService.get_cart_view(cart)
+
+
+@cart_router.delete("/products", response_model=CartRetrieveSchema)
+async def remove_products(
+        product_ids: List[int] = Query(..., min_length=1, max_length=1000),
+        current_user=Depends(get_current_user)):
+    """
+    Удаление нескольких товаров из корзины.
+    """
+    cart = await CartService.remove_products(current_user.id, product_ids)
+    return await CartService.get_cart_view(cart)
+
+
+@cart_router.delete("", response_model=CartRetrieveSchema)
+async def clear_cart(current_user=Depends(get_current_user)):
+    """
+    Очистка корзины.
+    """
+    cart = await CartService.clear_cart(current_user.id)
+    return await CartService.get_cart_view(cart)
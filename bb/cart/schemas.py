@@ -0,0 +1,44 @@
+from decimal import Decimal
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from bb.products.schemas import ProductRetrieveSchema
+
+
+class CartProductsSchema(BaseModel):
+    """
+    Схема для добавления товаров в корзину.
+
+    Атрибуты:
+        - product_ids (List[int]): Идентификаторы товаров. От 1 до 1000 значений.
+    """
+    product_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class CartRetrieveSchema(BaseModel):
+    """
+    Схема для чтения корзины.
+
+    Атрибуты:
+        - id (int): Идентификатор корзины.
+        - products (List[ProductRetrieveSchema]): Товары в корзине.
+        - total_price (Decimal): Общая стоимость товаров в корзине.
+    """
+    id: int
+    products: List[ProductRetrieveSchema]
+    total_price: Decimal
+
+
+class CartSummarySchema(BaseModel):
+    """
+    Схема итогов корзины без списка товаров.
+
+    Атрибуты:
+        - id (int): Идентификатор корзины.
+        - total_price (Decimal): Общая стоимость товаров в корзине.
+        - items_count (int): Количество товаров в корзине.
+    """
+    id: int
+    total_price: Decimal
+    items_count: int
@@ -0,0 +1,153 @@
+import logging
+from typing import List
+
+from bb.cart.models import ShoppingCart
+from bb.cart.schemas import CartRetrieveSchema, CartSummarySchema
+from bb.core.config import CART_CACHED_TOTALS
+from bb.products.models import Product
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProductsNotFoundError(ValueError):
+    """
+    Часть запрошенных товаров не существует или не активна.
+
+    Атрибуты:
+        - product_ids (List[int]): Идентификаторы ненайденных товаров.
+    """
+    def __init__(self, product_ids: List[int]) -> None:
+        super().__init__("Products not found")
+        self.product_ids = product_ids
+
+
+class CartService:
+    """
+    Сервис для работы с корзиной пользователя.
+
+    Операции над несколькими товарами выполняются фиксированным числом запросов,
+    независимо от количества товаров.
+    """
+    @staticmethod
+    async def get_cart(user_id: int) -> ShoppingCart:
+        """
+        Возвращает корзину пользователя, создавая ее при первом обращении.
+
+        Корзина создается запросом INSERT ... ON CONFLICT ("user_id") DO NOTHING: уникальный индекс
+        по user_id не дает одновременным первым запросам пользователя создать две корзины.
+
+        Параметры:
+            user_id (int): ID пользователя.
+
+        Возвращает:
+            ShoppingCart: Корзина пользователя.
+        """
+        cart = await ShoppingCart.get_or_none(user_id=user_id)
+        if cart is None:
+            await ShoppingCart._meta.db.execute_query(
+                """
+                INSERT INTO "shoppingcart" ("user_id", "cached_total", "items_count") VALUES ($1, 0, 0)
+                ON CONFLICT ("user_id") DO NOTHING
+                """,
+                [user_id],
+            )
+            cart = await ShoppingCart.get(user_id=user_id)
+        return cart
+
+    @staticmethod
+    async def add_products(user_id: int, product_ids: List[int]) -> ShoppingCart:
+        """
+        Добавляет в корзину несколько активных товаров.
+
+        Параметры:
+            - user_id (int): ID пользователя.
+            - product_ids (List[int]): Идентификаторы товаров. Товары, уже лежащие в корзине, пропускаются.
+
+        Возвращает:
+            ShoppingCart: Корзина пользователя.
+
+        Исключения:
+            ProductsNotFoundError: Если часть товаров не существует или не активна. Корзина не изменяется.
+        """
+        unique_ids = set(product_ids)
+        found_ids = await Product.filter(id__in=unique_ids, is_active=True).values_list('id', flat=True)
+        missing_ids = unique_ids - set(found_ids)
+        if missing_ids:
+            raise ProductsNotFoundError(sorted(missing_ids))
+        cart = await CartService.get_cart(user_id)
+        await cart.add_product(found_ids)
+        return cart
+
+    @staticmethod
+    async def remove_products(user_id: int, product_ids: List[int]) -> ShoppingCart:
+        """
+        Удаляет из корзины несколько товаров. Отсутствующие в корзине товары игнорируются.
+
+        Параметры:
+            - user_id (int): ID пользователя.
+            - product_ids (List[int]): Идентификаторы товаров.
+
+        Возвращает:
+            ShoppingCart: Корзина пользователя.
+        """
+        cart = await CartService.get_cart(user_id)
+        await cart.remove_product(list(set(product_ids)))
+        return cart
+
+    @staticmethod
+    async def clear_cart(user_id: int) -> ShoppingCart:
+        """
+        Удаляет из корзины все товары.
+
+        Параметры:
+            user_id (int): ID пользователя.
+
+        Возвращает:
+            ShoppingCart: Корзина пользователя.
+        """
+        cart = await CartService.get_cart(user_id)
+        await cart.clear_cart()
+        return cart
+
+    @staticmethod
+    async def get_cart_summary(cart: ShoppingCart) -> CartSummarySchema:
+        """
+        Возвращает общую стоимость и количество товаров в корзине.
+
+        При включенном CART_CACHED_TOTALS читает поддерживаемые инкрементально итоги корзины
+        одним запросом по первичному ключу, иначе считает их агрегатами в БД.
+
+        Параметры:
+            cart (ShoppingCart): Корзина пользователя.
+
+        Возвращает:
+            CartSummarySchema: Итоги корзины.
+        """
+        if CART_CACHED_TOTALS:
+            await cart.refresh_from_db(fields=['cached_total', 'items_count'])
+            return CartSummarySchema(id=cart.id, total_price=cart.cached_total, items_count=cart.items_count)
+        return CartSummarySchema(
+            id=cart.id,
+            total_price=await cart.total_price,
+            items_count=await cart.products.all().count(),
+        )
+
+    @staticmethod
+    async def get_cart_view(cart: ShoppingCart) -> CartRetrieveSchema:
+        """
+        Собирает содержимое корзины и ее общую стоимость.
+
+        Параметры:
+            cart (ShoppingCart): Корзина пользователя.
+
+        Возвращает:
+            CartRetrieveSchema: Товары в корзине и общая стоимость.
+        """
+        products = await cart.products.all().order_by('id')
+        if CART_CACHED_TOTALS:
+            await cart.refresh_from_db(fields=['cached_total'])
+            total_price = cart.cached_total
+        else:
+            total_price = await cart.total_price
+        return CartRetrieveSchema(id=cart.id, products=products, total_price=total_price)
@@ -2,8 +2,31 @@ import os
 
 from dotenv import load_dotenv
 
+# Единственное место загрузки .env: остальные модули берут настройки отсюда.
 load_dotenv()
 
+# Auth
+
+SECRET_KEY: str = os.getenv("SECRET_KEY")
+ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+REFRESH_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", 10080))
+# Выдавать новый токен обновления при каждом обновлении (иначе возвращается прежний до истечения его срока).
+REFRESH_TOKEN_ROTATION: bool = os.getenv("REFRESH_TOKEN_ROTATION", "false").lower() in ("1", "true", "yes")
+# Ключи для асимметричных алгоритмов (RS256, ES256): пути к PEM-файлам. Для HS* используется SECRET_KEY.
+# Воркеру без закрытого ключа достаточно открытого: он только проверяет токены.
+JWT_PRIVATE_KEY_FILE: str = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_PUBLIC_KEY_FILE: str = os.getenv("JWT_PUBLIC_KEY_FILE")
+# Кэш проверенных токенов: запись живет до exp токена, но не дольше TOKEN_CACHE_TTL. 0 отключает кэш.
+TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL: float = float(os.getenv("TOKEN_CACHE_TTL", 300))
+# Фильтр Блума отозванных токенов: ожидаемое количество действующих отзывов и доля ложноположительных
+# ответов (каждый такой ответ - лишний запрос к БД). Отзывы из других воркеров догружаются
+# не чаще раза в REVOCATION_REFRESH_INTERVAL секунд.
+REVOCATION_FILTER_CAPACITY: int = int(os.getenv("REVOCATION_FILTER_CAPACITY", 100000))
+REVOCATION_FILTER_ERROR_RATE: float = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", 0.001))
+REVOCATION_REFRESH_INTERVAL: float = float(os.getenv("REVOCATION_REFRESH_INTERVAL", 5))
+
 # Database
 
 POSTGRES_DB: str = os.getenv("POSTGRES_DB", "db_bigbazar")
@@ -17,17 +40,94 @@ DATABASE_CONNECT = f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
 DATABASE_URL = DATABASE_LOGIN + DATABASE_CONNECT
 
+# Создавать таблицы по моделям при старте приложения. В production схема управляется миграциями aerich,
+# поэтому python -m bb.server по умолчанию выключает этот шаг и старт обходится без запросов к схеме БД.
+DB_GENERATE_SCHEMAS: bool = os.getenv("DB_GENERATE_SCHEMAS", "true").lower() in ("1", "true", "yes")
+
+# Server
+
+# Параметры production-запуска (python -m bb.server). Аргументы командной строки переопределяют эти значения.
+SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(os.getenv("SERVER_PORT", 8000))
+SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", os.cpu_count() or 1))
+# Цикл событий и HTTP-парсер uvicorn: "auto" выбирает uvloop и httptools, если они установлены.
+SERVER_LOOP: str = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP: str = os.getenv("SERVER_HTTP", "auto")
+# Время в секундах: удержание keep-alive соединения и ожидание завершения запросов при остановке.
+SERVER_KEEP_ALIVE: int = int(os.getenv("SERVER_KEEP_ALIVE", 5))
+SERVER_GRACEFUL_SHUTDOWN_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_TIMEOUT", 30))
+# Длина очереди входящих соединений слушающего сокета.
+SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", 2048))
+
+# Cache invalidation
+
+# Инвалидация кэшей в памяти процесса между воркерами через LISTEN/NOTIFY на канале INVALIDATION_CHANNEL.
+# Выключение оставляет только локальную инвалидацию: в других воркерах записи живут до истечения TTL.
+INVALIDATION_ENABLED: bool = os.getenv("INVALIDATION_ENABLED", "true").lower() in ("1", "true", "yes")
+INVALIDATION_CHANNEL: str = os.getenv("INVALIDATION_CHANNEL", "bb_cache_invalidation")
+# Проверка соединения слушателя и максимальная пауза между попытками переподключения, с.
+INVALIDATION_HEALTHCHECK_INTERVAL: float = float(os.getenv("INVALIDATION_HEALTHCHECK_INTERVAL", 10))
+INVALIDATION_RECONNECT_MAX_DELAY: float = float(os.getenv("INVALIDATION_RECONNECT_MAX_DELAY", 30))
+
+# Connection pool
+
+# Общее число соединений с PostgreSQL, выделенное приложению. Если задано (не 0), DB_POOL_MAX_SIZE игнорируется:
+# при INVALIDATION_ENABLED из бюджета вычитается по одному соединению слушателя инвалидации на воркер
+# (оно открывается вне пула), остаток делится между пулами воркеров: (DB_CONNECTION_BUDGET - SERVER_WORKERS)
+# // SERVER_WORKERS. Без инвалидации размер пула равен DB_CONNECTION_BUDGET // SERVER_WORKERS.
+DB_CONNECTION_BUDGET: int = int(os.getenv("DB_CONNECTION_BUDGET", 0))
+# Размер пула asyncpg на один процесс. Сумма DB_POOL_MAX_SIZE по всем воркерам вместе с соединениями
+# слушателей инвалидации (по одному на воркер) должна укладываться в max_connections PostgreSQL.
+DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+if DB_CONNECTION_BUDGET:
+    _workers = max(1, SERVER_WORKERS)
+    _listeners = _workers if INVALIDATION_ENABLED else 0
+    DB_POOL_MAX_SIZE = max(1, (DB_CONNECTION_BUDGET - _listeners) // _workers)
+DB_POOL_MIN_SIZE: int = min(int(os.getenv("DB_POOL_MIN_SIZE", 2)), DB_POOL_MAX_SIZE)
+# Размер кэша подготовленных выражений на соединение (0 - для pgbouncer в режиме transaction).
+DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Простаивающее соединение закрывается через столько секунд, соединение пересоздается после DB_MAX_QUERIES запросов.
+DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = float(os.getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", 300))
+DB_MAX_QUERIES: int = int(os.getenv("DB_MAX_QUERIES", 50000))
+# Таймауты в секундах: выполнение запроса и ожидание свободного соединения. 0 - без таймаута.
+DB_COMMAND_TIMEOUT: float = float(os.getenv("DB_COMMAND_TIMEOUT", 30))
+DB_POOL_ACQUIRE_TIMEOUT: float = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", 10))
+
+DATABASE_CONNECTION = {
+    "engine": "bb.core.database",
+    "credentials": {
+        "host": POSTGRES_HOST,
+        "port": POSTGRES_PORT,
+        "user": POSTGRES_USER,
+        "password": POSTGRES_PASSWORD,
+        "database": POSTGRES_DB,
+        "minsize": DB_POOL_MIN_SIZE,
+        "maxsize": DB_POOL_MAX_SIZE,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "max_inactive_connection_lifetime": DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+        "max_queries": DB_MAX_QUERIES,
+        "command_timeout": DB_COMMAND_TIMEOUT or None,
+        "acquire_timeout": DB_POOL_ACQUIRE_TIMEOUT or None,
+    },
+}
+
 
 MODELS = [
     "bb.users.models",
     "bb.products.models",
     "bb.cart.models",
+    "bb.security.models",
 ]
 
+# Metrics
+
+# Метрики запросов и запросов к БД для /metrics. Выключение убирает middleware и логгер запросов asyncpg.
+METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
 # Tortoise ORM settings
 TORTOISE_ORM = {
     "connections": {
-        "default": DATABASE_URL
+        "default": DATABASE_CONNECTION
     },
     "apps": {
         "models": {
@@ -36,9 +136,65 @@ TORTOISE_ORM = {
                 "aerich.models"
             ],
             "default_connection": "default",
-            "generate_schemas": True,
             "add_exception_handlers": False,
         },
     },
 }
 
+# Password hashing
+
+# Тип пула для bcrypt: "thread" (bcrypt отпускает GIL) или "process".
+PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+# Размер пула - он же предел одновременно выполняемых хэширований.
+PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 12))
+
+# Auth admission control
+
+# Ограничение частоты /users/login и /users/register (bcrypt): корзины токенов по IP и по email.
+# RATE - токенов в секунду, BURST - емкость корзины. 0 в любом параметре отключает корзину.
+AUTH_IP_RATE: float = float(os.getenv("AUTH_IP_RATE", 2))
+AUTH_IP_BURST: int = int(os.getenv("AUTH_IP_BURST", 20))
+AUTH_EMAIL_RATE: float = float(os.getenv("AUTH_EMAIL_RATE", 0.2))
+AUTH_EMAIL_BURST: int = int(os.getenv("AUTH_EMAIL_BURST", 5))
+# Максимальное количество отслеживаемых IP и email (наиболее давние вытесняются).
+AUTH_LIMITER_SIZE: int = int(os.getenv("AUTH_LIMITER_SIZE", 100000))
+# Предел одновременно обрабатываемых запросов с bcrypt на процесс (0 - без предела)
+# и Retry-After в секундах при его превышении.
+AUTH_MAX_CONCURRENT_HASHES: int = int(os.getenv("AUTH_MAX_CONCURRENT_HASHES", PASSWORD_HASH_WORKERS * 4))
+AUTH_OVERLOAD_RETRY_AFTER: int = int(os.getenv("AUTH_OVERLOAD_RETRY_AFTER", 1))
+
+# Principal cache
+
+# Кэш пользователей для get_current_user по subject токена. 0 в любом параметре отключает кэш.
+PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+
+# Cart
+
+# Читать итоги корзины из поддерживаемых инкрементально полей вместо агрегатов SUM/COUNT.
+CART_CACHED_TOTALS: bool = os.getenv("CART_CACHED_TOTALS", "true").lower() in ("1", "true", "yes")
+
+# Product import
+
+# Количество строк в одной операции COPY и максимальное число ошибок строк в ответе импорта.
+PRODUCT_IMPORT_CHUNK_SIZE: int = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", 1000))
+PRODUCT_IMPORT_MAX_ERRORS: int = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", 1000))
+
+# Product cache
+
+# Кэш ответов GET /products/{id}: сериализованные активные продукты на PRODUCT_CACHE_TTL секунд,
+# отсутствующие или неактивные ID - на PRODUCT_CACHE_NEGATIVE_TTL. 0 в размере или TTL отключает кэш.
+PRODUCT_CACHE_SIZE: int = int(os.getenv("PRODUCT_CACHE_SIZE", 10000))
+PRODUCT_CACHE_TTL: float = float(os.getenv("PRODUCT_CACHE_TTL", 60))
+PRODUCT_CACHE_NEGATIVE_TTL: float = float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", 5))
+
+# Product export
+
+# Количество строк, читаемых из серверного курсора за один раз.
+PRODUCT_EXPORT_BATCH_SIZE: int = int(os.getenv("PRODUCT_EXPORT_BATCH_SIZE", 1000))
+
+# User list
+
+# Количество строк, читаемых из серверного курсора за один раз при потоковой выдаче списка пользователей.
+USER_STREAM_BATCH_SIZE: int = int(os.getenv("USER_STREAM_BATCH_SIZE", 1000))
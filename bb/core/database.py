@@ -0,0 +1,201 @@
+import asyncio
+import time
+from typing import AsyncIterator, List, Optional
+
+import asyncpg
+from tortoise import connections
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import ConfigurationError
+
+from bb.core.config import METRICS_ENABLED
+from bb.core.metrics import install_query_logger
+
+# Индексы и ограничения из миграций 3, 5, 6 и 8, которые не описываются моделями Tortoise.
+# Только идемпотентный DDL: переносы и пересчет данных выполняют миграции aerich.
+# Рекомендательная блокировка транзакции не дает воркерам, стартующим одновременно, создавать объекты наперегонки.
+SCHEMA_EXTRAS = """
+SELECT pg_advisory_xact_lock(hashtext('bb.schema_extras'));
+CREATE INDEX IF NOT EXISTS "idx_product_active_id" ON "product" ("id") WHERE "is_active";
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'pk_shoppingcart_product') THEN
+        ALTER TABLE "shoppingcart_product"
+            ADD CONSTRAINT "pk_shoppingcart_product" PRIMARY KEY ("shoppingcart_id", "product_id");
+    END IF;
+END $$;
+CREATE INDEX IF NOT EXISTS "idx_shoppingcart_product_product_id" ON "shoppingcart_product" ("product_id");
+ALTER TABLE "product" ADD COLUMN IF NOT EXISTS "search_vector" TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce("name", '')), 'A')
+    || setweight(to_tsvector('russian', coalesce("description", '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS "idx_product_search_vector" ON "product" USING GIN ("search_vector");
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_shoppingcart_user_id" ON "shoppingcart" ("user_id");
+"""
+
+
+class InstrumentedPool:
+    """
+    Обертка над пулом asyncpg, измеряющая ожидание соединений.
+
+    Все атрибуты, кроме acquire, делегируются исходному пулу.
+
+    Атрибуты:
+        - acquire_timeout (float, optional): Таймаут ожидания соединения по умолчанию в секундах.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, acquire_timeout: Optional[float] = None) -> None:
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.acquires = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    async def acquire(self, *, timeout: Optional[float] = None) -> asyncpg.Connection:
+        """
+        Берет соединение из пула, учитывая время ожидания и таймауты.
+        """
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            connection = await self._pool.acquire(timeout=timeout if timeout is not None else self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - started
+        self.acquires += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return connection
+
+    def stats(self) -> dict:
+        """
+        Возвращает состояние пула и статистику ожидания соединений.
+        """
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "timeouts": self.timeouts,
+            "avg_acquire_wait_ms": round(self.total_wait / self.acquires * 1000, 3) if self.acquires else 0.0,
+            "max_acquire_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class InstrumentedAsyncpgClient(AsyncpgDBClient):
+    """
+    Клиент Tortoise для asyncpg с таймаутом ожидания соединения и метриками пула.
+
+    Подключается через "engine": "bb.core.database" в настройках соединения Tortoise.
+    Дополнительный параметр acquire_timeout задает таймаут ожидания соединения из пула в секундах.
+    При METRICS_ENABLED к каждому соединению пула подключается логгер запросов для метрик.
+    """
+
+    def __init__(self, *args, acquire_timeout: Optional[float] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = float(acquire_timeout) if acquire_timeout else None
+
+    async def create_pool(self, **kwargs) -> InstrumentedPool:
+        if METRICS_ENABLED:
+            kwargs["init"] = install_query_logger
+        return InstrumentedPool(await super().create_pool(**kwargs), self.acquire_timeout)
+
+
+client_class = InstrumentedAsyncpgClient
+
+
+async def warm_up_pool(alias: str = "default") -> None:
+    """
+    Открывает минимальное количество соединений пула и проверяет их запросом SELECT 1.
+
+    Вызывается при старте приложения, чтобы первые запросы не ждали установки соединений.
+
+    Параметры:
+        alias (str, optional): Имя соединения Tortoise.
+    """
+    client = connections.get(alias)
+
+    async def ping() -> None:
+        async with client.acquire_connection() as connection:
+            await connection.execute("SELECT 1")
+
+    await asyncio.gather(*(ping() for _ in range(max(1, getattr(client, "pool_minsize", 1)))))
+
+
+async def apply_schema_extras(alias: str = "default") -> None:
+    """
+    Создает индексы и ограничения, которые не описываются моделями Tortoise (SCHEMA_EXTRAS).
+
+    generate_schemas создает только таблицы моделей, а запросы приложения рассчитывают, например,
+    на первичный ключ таблицы связи корзины (ON CONFLICT). Поэтому при DB_GENERATE_SCHEMAS
+    эти объекты создаются после таблиц, если их еще нет. Весь DDL выполняется одной транзакцией.
+
+    Параметры:
+        alias (str, optional): Имя соединения Tortoise.
+    """
+    await connections.get(alias).execute_script(SCHEMA_EXTRAS)
+
+
+def pool_stats(alias: str = "default") -> dict:
+    """
+    Возвращает метрики пула соединений: занятые и свободные соединения, ожидание и таймауты.
+
+    Параметры:
+        alias (str, optional): Имя соединения Tortoise.
+
+    Возвращает:
+        dict: Метрики пула или {"initialized": False}, если пул еще не создан.
+    """
+    try:
+        pool = getattr(connections.get(alias), "_pool", None)
+    except ConfigurationError:
+        pool = None
+    if pool is None:
+        return {"initialized": False}
+    if isinstance(pool, InstrumentedPool):
+        return {"initialized": True, **pool.stats()}
+    size, idle = pool.get_size(), pool.get_idle_size()
+    return {"initialized": True, "size": size, "idle": idle, "in_use": size - idle}
+
+
+async def iter_query_batches(
+        db: BaseDBAsyncClient,
+        query: str,
+        values: Optional[list] = None,
+        batch_size: int = 1000) -> AsyncIterator[List[asyncpg.Record]]:
+    """
+    Читает результат запроса пачками из серверного курсора.
+
+    В памяти одновременно находится не более batch_size строк. Курсору нужна транзакция,
+    поэтому соединение из пула удерживается до конца чтения.
+
+    Параметры:
+        - db (BaseDBAsyncClient): Клиент Tortoise (asyncpg), из пула которого берется соединение.
+        - query (str): SQL-запрос с параметрами $1, $2, ...
+        - values (list, optional): Значения параметров.
+        - batch_size (int, optional): Количество строк в пачке.
+
+    Возвращает:
+        AsyncIterator[List[asyncpg.Record]]: Пачки строк.
+    """
+    async with db.acquire_connection() as connection:
+        async with connection.transaction(readonly=True):
+            cursor = await connection.cursor(query, *(values or []))
+            while True:
+                batch = await cursor.fetch(batch_size)
+                if not batch:
+                    break
+                yield batch
@@ -0,0 +1,233 @@
+"""
+Шина инвалидации кэшей между воркерами на PostgreSQL LISTEN/NOTIFY.
+
+Кэши в памяти процесса (продукты, пользователи) регистрируют в шине тип сущности и функции удаления
+записи и полной очистки. Запись, изменившая сущность, вызывает invalidate: запись удаляется из кэша
+текущего процесса, а остальным воркерам отправляется pg_notify. Каждый воркер держит отдельное
+соединение asyncpg (вне пула) с LISTEN на канал и удаляет записи по полученным уведомлениям.
+
+Уведомления, отправленные, пока соединение слушателя разорвано, теряются, поэтому после
+переподключения все зарегистрированные кэши очищаются полностью.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+from tortoise import connections
+
+from bb.core.config import (
+    DATABASE_CONNECTION, INVALIDATION_CHANNEL, INVALIDATION_ENABLED, INVALIDATION_HEALTHCHECK_INTERVAL,
+    INVALIDATION_RECONNECT_MAX_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+# Предел размера payload NOTIFY в PostgreSQL - 8000 байт; ключи делятся на уведомления с запасом
+MAX_PAYLOAD_BYTES = 7900
+RECONNECT_MIN_DELAY = 0.5
+# Параметры подключения слушателя: без настроек пула
+LISTENER_CREDENTIALS = ("host", "port", "user", "password", "database")
+# application_name соединения слушателя, чтобы его было видно в pg_stat_activity
+LISTENER_APPLICATION_NAME = "bb-invalidation-listener"
+
+
+def encode_payloads(entity: str, keys: Iterable[str]) -> List[str]:
+    """
+    Упаковывает ключи в payload вида "entity:key1\\nkey2...", не длиннее MAX_PAYLOAD_BYTES каждый.
+    """
+    payloads = []
+    prefix = f"{entity}:"
+    current: List[str] = []
+    size = len(prefix.encode())
+    for key in keys:
+        key_size = len(key.encode()) + 1
+        if current and size + key_size > MAX_PAYLOAD_BYTES:
+            payloads.append(prefix + "\n".join(current))
+            current, size = [], len(prefix.encode())
+        current.append(key)
+        size += key_size
+    if current:
+        payloads.append(prefix + "\n".join(current))
+    return payloads
+
+
+def decode_payload(payload: str) -> Tuple[str, List[str]]:
+    """
+    Разбирает payload уведомления на тип сущности и ключи.
+    """
+    entity, _, keys = payload.partition(":")
+    return entity, keys.split("\n") if keys else []
+
+
+class InvalidationBus:
+    """
+    Регистрация кэшей, публикация инвалидаций и слушатель уведомлений других воркеров.
+
+    Атрибуты:
+        - channel (str): Канал LISTEN/NOTIFY.
+        - enabled (bool): Публиковать инвалидации и слушать канал. Если выключено, инвалидация только локальная.
+        - healthcheck_interval (float): Как часто проверять соединение слушателя запросом SELECT 1, с.
+        - reconnect_max_delay (float): Максимальная пауза между попытками переподключения, с.
+        - connected (asyncio.Event): Установлено, пока слушатель подключен и подписан на канал.
+    """
+
+    def __init__(
+            self, channel: str, enabled: bool, healthcheck_interval: float, reconnect_max_delay: float) -> None:
+        self.channel = channel
+        self.enabled = enabled
+        self.healthcheck_interval = healthcheck_interval
+        self.reconnect_max_delay = reconnect_max_delay
+        self.connected = asyncio.Event()
+        self._handlers: Dict[str, Tuple[Callable[[str], None], Callable[[], None]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.connects = 0
+        self.received = 0
+        self.published = 0
+        self.publish_errors = 0
+        self.flushes = 0
+
+    def register(self, entity: str, evict: Callable[[str], None], flush: Callable[[], None]) -> None:
+        """
+        Регистрирует кэш сущности.
+
+        Параметры:
+            - entity (str): Тип сущности в уведомлениях, например "product".
+            - evict (Callable[[str], None]): Удаляет запись по ключу (ключ приходит строкой).
+            - flush (Callable[[], None]): Полностью очищает кэш.
+        """
+        self._handlers[entity] = (evict, flush)
+
+    def evict(self, entity: str, keys: Iterable[str]) -> None:
+        handler = self._handlers.get(entity)
+        if handler is None:
+            return
+        for key in keys:
+            handler[0](key)
+
+    def flush(self) -> None:
+        """
+        Очищает все зарегистрированные кэши.
+        """
+        for _, flush in self._handlers.values():
+            flush()
+        self.flushes += 1
+
+    async def invalidate(self, entity: str, keys: Iterable) -> None:
+        """
+        Удаляет записи из кэша текущего процесса и сообщает об изменении остальным воркерам.
+
+        Уведомления отправляются одним запросом. Ошибка отправки не прерывает запрос, изменивший данные:
+        в других воркерах запись устареет не дольше TTL их кэша.
+
+        Параметры:
+            - entity (str): Тип сущности.
+            - keys (Iterable): Ключи измененных записей.
+        """
+        keys = [str(key) for key in keys]
+        if not keys:
+            return
+        self.evict(entity, keys)
+        if not self.enabled:
+            return
+        payloads = encode_payloads(entity, keys)
+        try:
+            await connections.get("default").execute_query(
+                "SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload", [self.channel, payloads]
+            )
+            self.published += len(payloads)
+        except Exception:
+            self.publish_errors += 1
+            logger.exception(f"Failed to publish cache invalidation for {entity}")
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        self.received += 1
+        entity, keys = decode_payload(payload)
+        self.evict(entity, keys)
+
+    async def _listen(self, credentials: dict) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    **credentials, server_settings={"application_name": LISTENER_APPLICATION_NAME}
+                )
+            except Exception as e:
+                logger.warning(f"Invalidation listener failed to connect, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _, event=lost: event.set())
+            try:
+                await connection.add_listener(self.channel, self._on_notification)
+                if self.connects:
+                    # Уведомления за время разрыва потеряны
+                    self.flush()
+                self.connects += 1
+                self.connected.set()
+                delay = RECONNECT_MIN_DELAY
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.healthcheck_interval)
+                    except asyncio.TimeoutError:
+                        await connection.fetchval("SELECT 1", timeout=self.healthcheck_interval)
+                logger.warning("Invalidation listener connection closed, reconnecting")
+            except Exception as e:
+                logger.warning(f"Invalidation listener connection lost, reconnecting: {e}")
+            finally:
+                self.connected.clear()
+                connection.terminate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max_delay)
+
+    async def start(self, credentials: Optional[dict] = None) -> None:
+        """
+        Запускает слушателя в фоне. Вызывается при старте приложения; подключение не задерживает старт.
+
+        Параметры:
+            credentials (dict, optional): Параметры подключения; по умолчанию из DATABASE_CONNECTION.
+        """
+        if not self.enabled or self._task is not None:
+            return
+        credentials = credentials or DATABASE_CONNECTION["credentials"]
+        self.connected = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(
+            self._listen({key: credentials[key] for key in LISTENER_CREDENTIALS if key in credentials})
+        )
+
+    async def stop(self) -> None:
+        """
+        Останавливает слушателя и закрывает его соединение.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.connected.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает состояние слушателя и счетчики уведомлений.
+        """
+        return {
+            "enabled": self.enabled,
+            "connected": self.connected.is_set(),
+            "reconnects": max(0, self.connects - 1),
+            "received": self.received,
+            "published": self.published,
+            "publish_errors": self.publish_errors,
+            "flushes": self.flushes,
+        }
+
+
+invalidation_bus = InvalidationBus(
+    channel=INVALIDATION_CHANNEL,
+    enabled=INVALIDATION_ENABLED,
+    healthcheck_interval=INVALIDATION_HEALTHCHECK_INTERVAL,
+    reconnect_max_delay=INVALIDATION_RECONNECT_MAX_DELAY,
+)
@@ -0,0 +1,277 @@
+"""
+Метрики HTTP-запросов и запросов к БД в текстовом формате Prometheus.
+
+Метрики хранятся в памяти процесса: при запуске нескольких воркеров каждый отдает свои значения.
+"""
+import asyncio
+import contextvars
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+
+# Границы корзин гистограмм в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+DB_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Маршрут для запросов, не совпавших ни с одним маршрутом приложения (например, 404)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """
+    Базовый класс метрики. Наследники задают kind и реализуют samples.
+
+    Атрибуты:
+        - name (str): Имя метрики.
+        - documentation (str): Описание для строки HELP.
+        - labelnames (Tuple[str, ...]): Имена меток.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """
+        Возвращает строки значений метрики без HELP и TYPE.
+        """
+
+    def collect(self) -> List[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus.
+        """
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик с метками.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, labels: Tuple[str, ...] = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """
+    Значение, которое может расти и уменьшаться.
+    """
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, labels: Tuple[str, ...] = ()) -> None:
+        self.inc(-amount, labels)
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными корзинами.
+
+    Наблюдение стоит одного bisect и нескольких сложений; накопительные суммы корзин считаются
+    только при выдаче метрик.
+
+    Атрибуты:
+        - buckets (Tuple[float, ...]): Верхние границы корзин по возрастанию (без +Inf).
+    """
+
+    kind = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, buckets: Tuple[float, ...],
+            labelnames: Tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Метки -> [количество в каждой корзине..., количество сверх последней границы, сумма]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == '+Inf' else f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+REQUEST_LATENCY = Histogram(
+    "bb_http_request_duration_seconds", "HTTP request latency by route.", LATENCY_BUCKETS,
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge("bb_http_requests_in_flight", "HTTP requests currently being processed.", ("method",))
+REQUEST_DB_QUERIES = Counter(
+    "bb_http_request_db_queries_total", "Database queries executed while handling requests.", ("method", "route"),
+)
+REQUEST_DB_SECONDS = Counter(
+    "bb_http_request_db_seconds_total", "Database time spent while handling requests.", ("method", "route"),
+)
+DB_QUERY_LATENCY = Histogram("bb_db_query_duration_seconds", "Database query latency.", DB_QUERY_BUCKETS)
+
+METRICS = (REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, DB_QUERY_LATENCY)
+
+
+class RequestDBStats:
+    """
+    Количество и суммарное время запросов к БД в рамках одного HTTP-запроса.
+    """
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Статистика текущего HTTP-запроса. Колбэки asyncpg выполняются в копии контекста задачи,
+# выполнившей запрос, поэтому изменяют объект этого HTTP-запроса.
+_request_db_stats: contextvars.ContextVar[Optional[RequestDBStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def log_query(record) -> None:
+    """
+    Колбэк asyncpg add_query_logger: учитывает время запроса в общей гистограмме и в текущем HTTP-запросе.
+    """
+    DB_QUERY_LATENCY.observe(record.elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += record.elapsed
+
+
+async def install_query_logger(connection: asyncpg.Connection) -> None:
+    """
+    Параметр init пула asyncpg: подключает log_query к каждому новому соединению.
+    """
+    connection.add_query_logger(log_query)
+
+
+def _record_request(method: str, route: str, status: str, duration: float, stats: RequestDBStats) -> None:
+    REQUEST_LATENCY.observe(duration, (method, route, status))
+    if stats.queries:
+        REQUEST_DB_QUERIES.inc(stats.queries, (method, route))
+        REQUEST_DB_SECONDS.inc(stats.seconds, (method, route))
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: задержка, количество выполняемых запросов и обращения к БД по маршрутам.
+
+    Метка route - шаблон пути маршрута (например, /products/{product_id}), а не фактический URL,
+    поэтому число серий ограничено числом маршрутов.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(labels=(method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec(labels=(method,))
+            _request_db_stats.reset(token)
+            route = scope.get("route")
+            # Колбэк последнего запроса к БД уже поставлен в очередь цикла событий через call_soon,
+            # поэтому запись, поставленная следом, увидит итоговую статистику.
+            asyncio.get_running_loop().call_soon(
+                _record_request, method, getattr(route, "path", UNMATCHED_ROUTE), str(status), duration, stats
+            )
+
+
+def render_stats(prefix: str, stats: dict) -> List[str]:
+    """
+    Представляет числовые значения словаря статистики (например, pool_stats()) как gauge-метрики.
+
+    Параметры:
+        - prefix (str): Префикс имен метрик.
+        - stats (dict): Статистика; нечисловые значения пропускаются, bool выводится как 0/1.
+
+    Возвращает:
+        List[str]: Строки в текстовом формате Prometheus.
+    """
+    lines = []
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        value = int(value) if isinstance(value, bool) else value
+        lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+    return lines
+
+
+def render_metrics(extra: Iterable[str] = ()) -> str:
+    """
+    Возвращает все метрики процесса в текстовом формате Prometheus.
+
+    Параметры:
+        extra (Iterable[str], optional): Дополнительные строки (например, из render_stats).
+    """
+    lines = [line for metric in METRICS for line in metric.collect()]
+    lines.extend(extra)
+    return '\n'.join(lines) + '\n'
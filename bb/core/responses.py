@@ -0,0 +1,41 @@
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Mapping
+
+import orjson
+from fastapi.responses import ORJSONResponse as BaseORJSONResponse
+from pydantic import BaseModel
+
+
+def orjson_default(value: Any) -> Any:
+    """
+    Сериализует типы, которые orjson не поддерживает, так же, как response_model на Pydantic v2:
+    Decimal - строкой без потери точности ("10.50"), модели - через model_dump(mode="json").
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(BaseORJSONResponse):
+    """
+    JSON-ответ на orjson с поддержкой Decimal и Pydantic-моделей.
+
+    Используется как класс ответа по умолчанию. Обработчики списков возвращают его напрямую
+    со словарями из .values(), минуя повторную валидацию response_model.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[Mapping]]) -> AsyncIterator[bytes]:
+    """
+    Сериализует пачки строк в NDJSON для StreamingResponse: по объекту на строку, один кусок на пачку.
+
+    Используется для потоковой выгрузки пользователей и продуктов: Decimal - строкой, даты - в ISO 8601.
+    """
+    async for batch in batches:
+        yield b''.join(
+            orjson.dumps(dict(row), default=orjson_default, option=orjson.OPT_APPEND_NEWLINE) for row in batch
+        )
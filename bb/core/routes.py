@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from bb.core.database import pool_stats
+from bb.core.invalidation import invalidation_bus
+from bb.core.metrics import render_metrics, render_stats
+from bb.products.services import product_cache
+from bb.security.admission import auth_admission
+from bb.security.auth import principal_cache
+from bb.security.passwords import password_hasher
+from bb.security.revocation import revocation_list
+from bb.security.tokens import token_codec
+
+system_router = APIRouter()
+metrics_router = APIRouter()
+
+
+@system_router.get("/stats", response_model=dict, summary="Get runtime statistics.")
+async def get_stats() -> dict:
+    """
+    Получить внутренние метрики приложения.
+
+    Возвращает:
+        dict: Метрики по разделам:
+            - db_pool: пул соединений с БД;
+            - password_hasher: пул хэширования паролей;
+            - auth_admission: контроль допуска к входу;
+            - principal_cache, product_cache: кэши пользователей и продуктов;
+            - cache_invalidation: инвалидация кэшей между воркерами;
+            - token_codec, token_revocation: кэш проверенных токенов и отзыв токенов.
+    """
+    return {
+        "db_pool": pool_stats(),
+        "password_hasher": password_hasher.stats(),
+        "auth_admission": auth_admission.stats(),
+        "principal_cache": principal_cache.stats(),
+        "product_cache": product_cache.stats(),
+        "cache_invalidation": invalidation_bus.stats(),
+        "token_codec": token_codec.stats(),
+        "token_revocation": revocation_list.stats(),
+    }
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Метрики процесса в текстовом формате Prometheus: задержки и обращения к БД по маршрутам,
+    а также значения из /system/stats.
+    """
+    extra = [
+        *render_stats("bb_db_pool", pool_stats()),
+        *render_stats("bb_password_hasher", password_hasher.stats()),
+        *render_stats("bb_auth_admission", auth_admission.stats()),
+        *render_stats("bb_principal_cache", principal_cache.stats()),
+        *render_stats("bb_product_cache", product_cache.stats()),
+        *render_stats("bb_cache_invalidation", invalidation_bus.stats()),
+        *render_stats("bb_token_codec", token_codec.stats()),
+        *render_stats("bb_token_revocation", revocation_list.stats()),
+    ]
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import register_tortoise
 
-from bb.core.config import DATABASE_URL, MODELS
+from bb.cart.routes import cart_router
+from bb.core.config import DATABASE_CONNECTION, DB_GENERATE_SCHEMAS, METRICS_ENABLED, MODELS
+from bb.core.database import apply_schema_extras, warm_up_pool
+from bb.core.invalidation import invalidation_bus
+from bb.core.metrics import MetricsMiddleware
+from bb.core.routes import metrics_router, system_router
+from bb.security.passwords import password_hasher
+from bb.security.revocation import revocation_list
 from bb.users.routes import users_router
 from bb.products.routes import products_router
 
@@ -10,6 +17,12 @@ def setup_database(app: FastAPI) -> None:
     """
     Настраивает подключение к базе данных.
 
+    Пул соединений настраивается параметрами DB_* из конфигурации и прогревается при старте приложения,
+    затем загружается список отозванных токенов и запускается слушатель инвалидации кэшей.
+    При остановке приложения останавливаются слушатель и пул хэширования паролей.
+    Таблицы создаются по моделям только при DB_GENERATE_SCHEMAS, вместе с индексами и ограничениями из миграций
+    (apply_schema_extras), иначе схема считается примененной миграциями.
+
     Parameters:
         - app (FastAPI): Экземпляр FastAPI приложения.
 
@@ -18,12 +31,24 @@ def setup_database(app: FastAPI) -> None:
     """
     register_tortoise(
         app,
-        db_url=DATABASE_URL,
-        modules={
-            "models": [*MODELS],
+        config={
+            "connections": {"default": DATABASE_CONNECTION},
+            "apps": {
+                "models": {
+                    "models": [*MODELS],
+                    "default_connection": "default",
+                },
+            },
         },
-        generate_schemas=True,
+        generate_schemas=DB_GENERATE_SCHEMAS,
     )
+    if DB_GENERATE_SCHEMAS:
+        app.add_event_handler("startup", apply_schema_extras)
+    app.add_event_handler("startup", warm_up_pool)
+    app.add_event_handler("startup", revocation_list.load)
+    app.add_event_handler("startup", invalidation_bus.start)
+    app.add_event_handler("shutdown", invalidation_bus.stop)
+    app.add_event_handler("shutdown", password_hasher.shutdown)
 
 
 def setup_routes(app: FastAPI) -> None:
@@ -38,3 +63,20 @@ def setup_routes(app: FastAPI) -> None:
     """
     app.include_router(users_router, prefix="/users", tags=["users"])
     app.include_router(products_router, prefix="", tags=["products"])
+    app.include_router(cart_router, prefix="/cart", tags=["cart"])
+    app.include_router(system_router, prefix="/system", tags=["system"])
+    app.include_router(metrics_router, tags=["system"])
+
+
+def setup_middleware(app: FastAPI) -> None:
+    """
+    Настраивает middleware приложения: сбор метрик запросов для /metrics при METRICS_ENABLED.
+
+    Parameters:
+        - app (FastAPI): Экземпляр FastAPI приложения.
+
+    Returns:
+        - None
+    """
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
@@ -1,16 +1,19 @@
-import uvicorn
 from fastapi import FastAPI
 
-from bb.factory import setup_routes, setup_database
+from bb.core.responses import ORJSONResponse
+from bb.factory import setup_middleware, setup_routes, setup_database
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 setup_database(app)
 setup_routes(app)
+setup_middleware(app)
 
 
 if __name__ == '__main__':
+    import uvicorn
+
     uvicorn.run(
         app="bb.main:app",
         host="localhost",
@@ -0,0 +1,34 @@
+import csv
+import io
+from typing import AsyncIterator, List
+
+from asyncpg import Record
+
+EXPORT_COLUMNS = ['id', 'name', 'description', 'price', 'is_active', 'created_at', 'updated_at', 'owner_id']
+
+
+def _export_value(value):
+    """
+    Приводит значение к виду для CSV: цена - строкой без потери точности, даты - в ISO 8601.
+    """
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (bool, int, str)):
+        return str(value)
+    return value
+
+
+async def csv_chunks(batches: AsyncIterator[List[Record]]) -> AsyncIterator[bytes]:
+    """
+    Сериализует пачки строк в CSV с заголовком, один кусок ответа на пачку.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for batch in batches:
+        writer.writerows([_export_value(row[column]) for column in EXPORT_COLUMNS] for row in batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
@@ -0,0 +1,105 @@
+import csv
+import json
+from typing import AsyncIterator, Tuple, Union
+
+# Максимальная длина одной записи. Защищает от неограниченного роста буфера на строке без перевода строки.
+MAX_RECORD_BYTES = 1024 * 1024
+
+
+class ImportFormatError(ValueError):
+    """
+    Поток импорта нельзя разобрать дальше (например, слишком длинная запись или неверный заголовок CSV).
+    """
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Разбивает поток байтов на строки, не загружая его в память целиком.
+
+    Параметры:
+        stream (AsyncIterator[bytes]): Поток тела запроса.
+
+    Возвращает:
+        AsyncIterator[Tuple[int, str]]: Номер строки (с 1) и ее текст без перевода строки.
+
+    Вызывает:
+        ImportFormatError: Если строка длиннее MAX_RECORD_BYTES.
+    """
+    buffer = b''
+    line_number = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip(b'\r').decode('utf-8', errors='replace')
+        if len(buffer) > MAX_RECORD_BYTES:
+            raise ImportFormatError(f"Line {line_number + 1} exceeds {MAX_RECORD_BYTES} bytes")
+    if buffer.strip():
+        yield line_number + 1, buffer.rstrip(b'\r').decode('utf-8', errors='replace')
+
+
+async def iter_ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """
+    Читает NDJSON: по одному JSON-объекту на строку. Пустые строки пропускаются.
+
+    Возвращает:
+        AsyncIterator[Tuple[int, Union[dict, str]]]: Номер строки и объект или текст ошибки разбора.
+    """
+    async for line_number, line in iter_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, row
+
+
+async def iter_csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """
+    Читает CSV с заголовком. Поля в кавычках могут содержать запятые и переводы строк.
+
+    Возвращает:
+        AsyncIterator[Tuple[int, Union[dict, str]]]: Номер первой строки записи и словарь полей
+        или текст ошибки разбора.
+
+    Вызывает:
+        ImportFormatError: Если заголовок пуст или запись длиннее MAX_RECORD_BYTES.
+    """
+    header = None
+    record, record_line = '', 0
+    async for line_number, line in iter_lines(stream):
+        if not record:
+            record_line = line_number
+            record = line
+        else:
+            record += '\n' + line
+        # Нечетное количество кавычек - поле в кавычках продолжается на следующей строке
+        if record.count('"') % 2:
+            if len(record) > MAX_RECORD_BYTES:
+                raise ImportFormatError(f"Record at line {record_line} exceeds {MAX_RECORD_BYTES} bytes")
+            continue
+        text, record = record, ''
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield record_line, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            if not any(header):
+                raise ImportFormatError("CSV header is empty")
+            continue
+        if len(values) != len(header):
+            yield record_line, f"Expected {len(header)} fields, got {len(values)}"
+            continue
+        yield record_line, {name: value for name, value in zip(header, values) if value != ''}
+    if record:
+        yield record_line, "Unterminated quoted field"
@@ -14,6 +14,9 @@ class Product(models.Model):
     - updated_at (datetime): Дата и время последнего обновления товара.
     - owner (models.User): Владелец товара.
 
+    В таблице также есть генерируемый столбец search_vector (tsvector по name и description с GIN-индексом),
+    который создается миграцией и не описывается моделью: он используется только в полнотекстовом поиске.
+
     Методы:
     - __str__(): Возвращает название товара в виде строки.
 
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List
-from bb.products.schemas import ProductRetrieveSchema, ProductCreateUpdateSchema, ProductPartialUpdateSchema
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional
+from bb.core.responses import ORJSONResponse, ndjson_chunks
+from bb.products.exporters import csv_chunks
+from bb.products.importers import iter_csv_rows, iter_ndjson_rows
+from bb.products.schemas import (
+    ProductRetrieveSchema, ProductCreateUpdateSchema, ProductPartialUpdateSchema, ProductPageSchema,
+    ProductImportResultSchema, ProductBulkSelectionSchema, ProductBulkStatusSchema, ProductBulkResultSchema
+)
 from bb.products.services import ProductService
 from bb.security.auth import get_current_user
+from bb.service.pagination import encode_cursor, decode_cursor
 
 products_router = APIRouter()
 
@@ -16,6 +24,116 @@ async def create_product(product_data: ProductCreateUpdateSchema, current_user=D
     return product
 
 
+@products_router.post("/products/import", response_model=ProductImportResultSchema)
+async def import_products(
+        request: Request,
+        format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="По умолчанию по Content-Type."),
+        current_user=Depends(get_current_user)):
+    """
+    Массовый импорт продуктов из потока NDJSON или CSV. Доступно только авторизованным пользователям.
+
+    Тело запроса читается потоково: NDJSON - по объекту на строку, CSV - с заголовком name,description,price.
+    Ошибочные строки не прерывают импорт и возвращаются в списке errors. Если поток нельзя разобрать дальше,
+    возвращается результат импорта строк до ошибки и ее описание в format_error.
+    """
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    rows = iter_csv_rows(request.stream()) if format == "csv" else iter_ndjson_rows(request.stream())
+    return await ProductService.import_products(rows, owner_id=current_user.id)
+
+
+@products_router.get("/products/export", response_class=StreamingResponse)
+async def export_products(
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        owner_id: Optional[int] = Query(None),
+        is_active: Optional[bool] = Query(None),
+        current_user=Depends(get_current_user)):
+    """
+    Потоковая выгрузка каталога в NDJSON или CSV. Доступно только авторизованным пользователям.
+
+    Фильтры соответствуют полям is_active и owner продукта. Неактивные продукты выгружаются только
+    владельцу: без фильтра is_active выгружаются все свои продукты (owner_id текущего пользователя)
+    или только активные продукты остальных владельцев.
+    """
+    if owner_id != current_user.id:
+        if is_active is False:
+            raise HTTPException(status_code=403, detail="Inactive products can only be exported by their owner")
+        is_active = True
+    batches = ProductService.export_products(owner_id=owner_id, is_active=is_active)
+    if format == "csv":
+        return StreamingResponse(
+            csv_chunks(batches), media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="products.csv"'},
+        )
+    return StreamingResponse(ndjson_chunks(batches), media_type="application/x-ndjson")
+
+
+@products_router.get("/products/search", response_model=ProductPageSchema)
+async def search_products(
+        q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос."),
+        limit: int = Query(10, gt=0, le=100),
+        after: Optional[str] = Query(None, description="Курсор next_cursor предыдущей страницы."),
+        current_user=Depends(get_current_user)):
+    """
+    Полнотекстовый поиск активных продуктов по названию и описанию. Доступно всем пользователям.
+
+    Результаты упорядочены по релевантности, пагинация по курсору, как в списке продуктов.
+    """
+    after_key = None
+    if after is not None:
+        try:
+            after_key = decode_cursor(after, float, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    products, last_key = await ProductService.search_products(q, limit, after_key)
+    return ORJSONResponse({
+        "items": products,
+        "next_cursor": encode_cursor(*last_key) if last_key is not None else None,
+    })
+
+
+@products_router.get("/products/{product_id}", response_model=ProductRetrieveSchema)
+async def get_product(product_id: int, current_user=Depends(get_current_user)):
+    """
+    Получение активного продукта по ID. Доступно всем пользователям.
+
+    Ответ отдается из кэша продуктов, если он там есть. Неактивные продукты, как и в списке, не отдаются.
+    """
+    payload = await ProductService.get_active_product_json(product_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # JSON уже содержит ровно поля схемы, поэтому отдается напрямую, без валидации response_model
+    return Response(content=payload, media_type="application/json")
+
+
+def check_bulk_owner(selection: ProductBulkSelectionSchema, current_user) -> None:
+    """
+    Массовые операции доступны только над своими продуктами: чужой owner_id запрещен.
+    """
+    if selection.owner_id is not None and selection.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Bulk operations are allowed only on your own products")
+
+
+@products_router.post("/products/bulk/status", response_model=ProductBulkResultSchema)
+async def bulk_set_product_status(data: ProductBulkStatusSchema, current_user=Depends(get_current_user)):
+    """
+    Массовое включение/выключение продуктов текущего пользователя по списку ID или по владельцу.
+    """
+    check_bulk_owner(data, current_user)
+    affected = await ProductService.bulk_set_active_status(current_user.id, data.is_active, data.ids)
+    return {"affected": affected}
+
+
+@products_router.post("/products/bulk/delete", response_model=ProductBulkResultSchema)
+async def bulk_delete_products(data: ProductBulkSelectionSchema, current_user=Depends(get_current_user)):
+    """
+    Массовое удаление продуктов текущего пользователя по списку ID или по владельцу.
+    """
+    check_bulk_owner(data, current_user)
+    affected = await ProductService.bulk_delete_products(current_user.id, data.ids)
+    return {"affected": affected}
+
+
 @products_router.patch("/products/{product_id}", response_model=ProductRetrieveSchema)
 async def update_product(product_id: int, product_data: ProductPartialUpdateSchema, current_user=Depends(get_current_user)):
     """
@@ -38,10 +156,25 @@ async def delete_product(product_id: int, current_user=Depends(get_current_user)
     return {"message": "Product deleted successfully"}
 
 
-@products_router.get("/products", response_model=List[ProductRetrieveSchema])
-async def list_products(limit: int = Query(10, gt=0), offset: int = Query(0, gt=0), current_user=Depends(get_current_user)):
+@products_router.get("/products", response_model=ProductPageSchema)
+async def list_products(
+        limit: int = Query(10, gt=0, le=100),
+        after: Optional[str] = Query(None, description="Курсор next_cursor предыдущей страницы."),
+        current_user=Depends(get_current_user)):
     """
     Получение списка активных продуктов. Доступно всем пользователям.
+
+    Пагинация по курсору: для следующей страницы передайте next_cursor из ответа в параметре after.
     """
-    products = await ProductService.get_active_products(limit, offset)
-    return products
+    after_id = None
+    if after is not None:
+        try:
+            after_id, = decode_cursor(after, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    products, last_id = await ProductService.get_active_products(limit, after_id)
+    # Строки уже содержат ровно поля схемы, поэтому сериализуются напрямую, без валидации response_model
+    return ORJSONResponse({
+        "items": products,
+        "next_cursor": encode_cursor(last_id) if last_id is not None else None,
+    })
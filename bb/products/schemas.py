@@ -1,11 +1,16 @@
-from typing import Optional
+from typing import Annotated, List, Optional
 from decimal import Decimal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from tortoise.contrib.pydantic import pydantic_model_creator
 
 from bb.products.models import Product
 
 ProductRetrieveSchema = pydantic_model_creator(Product, name="Product",  exclude=("is_active",))
+# Поля, выбираемые из БД для списков продуктов (.values()), - ровно поля ProductRetrieveSchema
+PRODUCT_LIST_FIELDS = tuple(ProductRetrieveSchema.model_fields)
+# Наибольшая цена, которую вмещает столбец price DECIMAL(10,2)
+MAX_PRICE = Decimal("99999999.99")
+Price = Annotated[Decimal, Field(gt=0, le=MAX_PRICE, decimal_places=2)]
 
 
 class ProductCreateUpdateSchema(BaseModel):
@@ -15,11 +20,11 @@ class ProductCreateUpdateSchema(BaseModel):
     Атрибуты:
         - name (str): Название продукта. Должно быть не длиннее 150 символов.
         - description (Optional[str]): Описание продукта. Может быть не указано. Максимальная длина - 350 символов.
-        - price (Decimal): Цена продукта. Должна быть больше нуля.
+        - price (Decimal): Цена продукта. Должна быть больше нуля и помещаться в DECIMAL(10,2).
     """
     name: str = Field(..., max_length=150)
     description: Optional[str] = Field(None, max_length=350)
-    price: Decimal = Field(..., gt=0)
+    price: Price
 
 
 class ProductPartialUpdateSchema(BaseModel):
@@ -29,8 +34,90 @@ class ProductPartialUpdateSchema(BaseModel):
     Атрибуты:
         - name (Optional[str]): Новое название продукта. Может быть не указано. Длина до 150 символов.
         - description (Optional[str]): Новое описание продукта. Может быть не указано. Длина до 350 символов.
-        - price (Optional[Decimal]): Новая цена продукта. Может быть не указана. Должна быть больше нуля.
+        - price (Optional[Decimal]): Новая цена продукта. Может быть не указана. Должна быть больше нуля
+          и помещаться в DECIMAL(10,2).
     """
     name: Optional[str] = Field(None, max_length=150)
     description: Optional[str] = Field(None, max_length=350)
-    price: Optional[Decimal] = Field(None, gt=0)
+    price: Optional[Price] = None
+
+
+class ProductPageSchema(BaseModel):
+    """
+    Схема страницы списка продуктов.
+
+    Атрибуты:
+        - items (List[ProductRetrieveSchema]): Продукты на странице.
+        - next_cursor (Optional[str]): Курсор следующей страницы или None, если страница последняя.
+    """
+    items: List[ProductRetrieveSchema]
+    next_cursor: Optional[str] = None
+
+
+class ProductImportErrorSchema(BaseModel):
+    """
+    Ошибка одной строки импорта.
+
+    Атрибуты:
+        - line (int): Номер строки во входных данных.
+        - errors (List[str]): Описания ошибок.
+    """
+    line: int
+    errors: List[str]
+
+
+class ProductImportResultSchema(BaseModel):
+    """
+    Результат массового импорта продуктов.
+
+    Атрибуты:
+        - created (int): Количество созданных продуктов.
+        - failed (int): Количество отклоненных строк.
+        - errors (List[ProductImportErrorSchema]): Ошибки строк (не более PRODUCT_IMPORT_MAX_ERRORS).
+        - format_error (Optional[str]): Ошибка формата, на которой разбор потока остановился; строки до нее
+          импортированы.
+    """
+    created: int = 0
+    failed: int = 0
+    errors: List[ProductImportErrorSchema] = []
+    format_error: Optional[str] = None
+
+
+class ProductBulkSelectionSchema(BaseModel):
+    """
+    Выбор продуктов для массовой операции: список ID и/или фильтр по владельцу.
+
+    Операция всегда затрагивает только продукты текущего пользователя.
+
+    Атрибуты:
+        - ids (Optional[List[int]]): ID продуктов (от 1 до 1000).
+        - owner_id (Optional[int]): ID владельца; без ids выбираются все его продукты.
+    """
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    owner_id: Optional[int] = None
+
+    @model_validator(mode='after')
+    def check_selection(self) -> 'ProductBulkSelectionSchema':
+        if self.ids is None and self.owner_id is None:
+            raise ValueError("Either ids or owner_id must be provided")
+        return self
+
+
+class ProductBulkStatusSchema(ProductBulkSelectionSchema):
+    """
+    Массовая установка статуса активности.
+
+    Атрибуты:
+        - is_active (bool): Статус активности для установки.
+    """
+    is_active: bool
+
+
+class ProductBulkResultSchema(BaseModel):
+    """
+    Результат массовой операции.
+
+    Атрибуты:
+        - affected (int): Количество измененных или удаленных продуктов.
+    """
+    affected: int
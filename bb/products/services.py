@@ -1,16 +1,103 @@
 import logging
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, List, Optional, Tuple, Union
 
+import asyncpg
+import orjson
+from pydantic import ValidationError
 from tortoise.exceptions import IntegrityError
 
+from bb.core.config import (
+    PRODUCT_CACHE_NEGATIVE_TTL, PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL, PRODUCT_EXPORT_BATCH_SIZE,
+    PRODUCT_IMPORT_CHUNK_SIZE, PRODUCT_IMPORT_MAX_ERRORS
+)
+from bb.core.database import iter_query_batches
+from bb.core.invalidation import invalidation_bus
+from bb.core.responses import orjson_default
+from bb.products.exporters import EXPORT_COLUMNS
+from bb.products.importers import ImportFormatError
 from bb.products.models import Product
-from bb.products.schemas import ProductCreateUpdateSchema, ProductPartialUpdateSchema
+from bb.products.schemas import (
+    ProductCreateUpdateSchema, ProductPartialUpdateSchema, ProductImportResultSchema, ProductImportErrorSchema,
+    PRODUCT_LIST_FIELDS
+)
+from bb.service.cache import TTLCache
 
 
 # Настройка логгера
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Кэш GET /products/{id}: ID -> JSON активного продукта (поля ProductRetrieveSchema) или PRODUCT_NOT_FOUND.
+# Записи удаляются при изменении, удалении и смене статуса продукта во всех воркерах (invalidation_bus).
+# Новые продукты (create_product, import_products) создаются неактивными, поэтому отрицательная запись
+# для их ID остается верной.
+product_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+PRODUCT_NOT_FOUND = b""
+invalidation_bus.register("product", evict=lambda key: product_cache.invalidate(int(key)), flush=product_cache.clear)
+
+
+async def invalidate_products(ids: Iterable[int]) -> None:
+    """
+    Удаляет продукты из кэша GET /products/{id} в текущем процессе и в остальных воркерах.
+    """
+    await invalidation_bus.invalidate("product", ids)
+
+
+def _returning_columns() -> str:
+    """
+    Столбцы модели Product для RETURNING в запросах, изменяющих продукт.
+
+    Вычисляются при вызове: столбцы внешних ключей (owner_id) появляются в метаданных только после Tortoise.init.
+    """
+    return ', '.join(f'"product"."{column}"' for column in Product._meta.fields_db_projection.values())
+
+
+def _bulk_condition(owner_id: int, ids: Optional[List[int]], values: list) -> str:
+    """
+    Условие WHERE массовой операции: только продукты владельца и, если задан, только из списка ids.
+
+    Параметры добавляются в values.
+    """
+    values.append(owner_id)
+    condition = f'"owner_id" = ${len(values)}'
+    if ids is not None:
+        values.append(ids)
+        condition += f' AND "id" = ANY(${len(values)}::int[])'
+    return condition
+
+
+async def _delete_products(condition: str, values: list) -> List[dict]:
+    """
+    Удаляет продукты по условию одним запросом DELETE ... RETURNING.
+
+    В том же запросе удаленные продукты вычитаются из cached_total и items_count корзин (суммарно по каждой
+    корзине). Строки корзин удаляются каскадно.
+
+    Возвращает:
+        List[dict]: ID удаленных продуктов.
+    """
+    return await Product._meta.db.execute_query_dict(
+        f"""
+        WITH "deleted" AS (
+            DELETE FROM "product" WHERE {condition} RETURNING "id", "price"
+        ), "carts" AS (
+            UPDATE "shoppingcart" SET
+                "cached_total" = "shoppingcart"."cached_total" - "removed"."total",
+                "items_count" = "shoppingcart"."items_count" - "removed"."count"
+            FROM (
+                SELECT "shoppingcart_product"."shoppingcart_id", SUM("deleted"."price") AS "total", COUNT(*) AS "count"
+                FROM "deleted"
+                JOIN "shoppingcart_product" ON "shoppingcart_product"."product_id" = "deleted"."id"
+                GROUP BY "shoppingcart_product"."shoppingcart_id"
+            ) AS "removed"
+            WHERE "shoppingcart"."id" = "removed"."shoppingcart_id"
+        )
+        SELECT "id" FROM "deleted"
+        """,
+        values,
+    )
+
 
 class ProductService:
     """
@@ -56,15 +143,44 @@ class ProductService:
         Возвращает:
             Optional[Product]: Обновленный объект продукта или None, если продукт не найден.
 
+        Обновление выполняется одним запросом UPDATE ... RETURNING. При изменении цены итоги корзин,
+        содержащих продукт, корректируются в том же запросе.
+
         Логирует:
             Предупреждение, если продукт с указанным ID не найден.
         """
-        product = await Product.get_or_none(id=product_id)
-        if product:
-            for attr, value in product_data.model_dump(exclude_unset=True).items():
-                setattr(product, attr, value)
-            await product.save()
-            return product
+        values = [product_id]
+        assignments = []
+        for attr, value in product_data.model_dump(exclude_unset=True).items():
+            values.append(value)
+            cast = '::numeric' if attr == 'price' else ''
+            assignments.append(f'"{attr}" = ${len(values)}{cast}')
+        assignments.append('"updated_at" = CURRENT_TIMESTAMP')
+        rows = await Product._meta.db.execute_query_dict(
+            f"""
+            WITH "old" AS (
+                SELECT "id", "price" FROM "product" WHERE "id" = $1 FOR UPDATE
+            ), "updated" AS (
+                UPDATE "product" SET {', '.join(assignments)}
+                FROM "old" WHERE "product"."id" = "old"."id"
+                RETURNING {_returning_columns()}, "old"."price" AS "old_price"
+            ), "carts" AS (
+                UPDATE "shoppingcart"
+                SET "cached_total" = "shoppingcart"."cached_total" + ("updated"."price" - "updated"."old_price")
+                FROM "updated", "shoppingcart_product"
+                WHERE "updated"."price" <> "updated"."old_price"
+                  AND "shoppingcart_product"."product_id" = "updated"."id"
+                  AND "shoppingcart"."id" = "shoppingcart_product"."shoppingcart_id"
+            )
+            SELECT * FROM "updated"
+            """,
+            values,
+        )
+        if rows:
+            row = rows[0]
+            del row['old_price']
+            await invalidate_products([product_id])
+            return Product._init_from_db(**row)
         logger.warning(f"Product not found for update: {product_id}")
         return None
 
@@ -73,36 +189,76 @@ class ProductService:
         """
         Удаляет продукт из базы данных по его ID.
 
+        Удаление выполняется одним запросом DELETE ... RETURNING, который в том же запросе вычитает продукт
+        из итогов корзин. Строки корзин удаляются каскадно.
+
         Параметры:
             product_id (int): Уникальный идентификатор продукта для удаления.
 
         Возвращает:
             bool: True, если продукт успешно удален, False, если продукт не найден.
         """
-        product = await Product.get_or_none(id=product_id)
-        if product:
-            await product.delete()
-            return True
-        return False
+        rows = await _delete_products('"id" = $1', [product_id])
+        await invalidate_products(row['id'] for row in rows)
+        return bool(rows)
 
     @staticmethod
-    async def get_active_products(limit: int = 10, offset: int = 0) -> List[Product]:
+    async def get_active_products(limit: int = 10, after_id: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
         """
-        Получает список активных продуктов с пагинацией.
+        Получает страницу активных продуктов с пагинацией по ключу (keyset).
+
+        Продукты упорядочены по id, следующая страница начинается после последнего id предыдущей,
+        поэтому стоимость запроса не зависит от глубины страницы. Выбираются только поля
+        ProductRetrieveSchema, без создания объектов модели.
 
         Параметры:
             - limit (int, optional): Максимальное количество продуктов для возврата.
-            - offset (int, optional): Смещение начала списка продуктов (для пагинации).
+            - after_id (int, optional): id последнего продукта предыдущей страницы.
+
+        Возвращает:
+            Tuple[List[dict], Optional[int]]: Список активных продуктов и id, после которого
+            начинается следующая страница, или None, если страница последняя.
+        """
+        query = Product.filter(is_active=True)
+        if after_id is not None:
+            query = query.filter(id__gt=after_id)
+        products = await query.order_by('id').limit(limit + 1).values(*PRODUCT_LIST_FIELDS)
+        if len(products) > limit:
+            products = products[:limit]
+            return products, products[-1]['id']
+        return products, None
+
+    @staticmethod
+    async def get_active_product_json(product_id: int) -> Optional[bytes]:
+        """
+        Получает активный продукт по ID в виде готового JSON с полями ProductRetrieveSchema.
+
+        Чтение идет через product_cache: найденные продукты кэшируются на PRODUCT_CACHE_TTL,
+        отсутствующие и неактивные - на PRODUCT_CACHE_NEGATIVE_TTL. Если во время чтения из БД
+        кэш был инвалидирован, прочитанное значение в кэш не записывается.
+
+        Параметры:
+            product_id (int): Уникальный идентификатор продукта.
 
         Возвращает:
-            List[Product]: Список активных продуктов.
+            Optional[bytes]: JSON продукта или None, если продукт не найден или неактивен.
         """
-        return await Product.filter(is_active=True).offset(offset).limit(limit).all()
+        payload = product_cache.get(product_id)
+        if payload is None:
+            generation = product_cache.generation
+            row = await Product.filter(id=product_id, is_active=True).first().values(*PRODUCT_LIST_FIELDS)
+            if row is None:
+                payload = PRODUCT_NOT_FOUND
+                product_cache.set(product_id, payload, ttl=PRODUCT_CACHE_NEGATIVE_TTL, generation=generation)
+            else:
+                payload = orjson.dumps(row, default=orjson_default)
+                product_cache.set(product_id, payload, generation=generation)
+        return payload or None
 
     @staticmethod
     async def set_product_active_status(product_id: int, is_active: bool) -> Optional[Product]:
         """
-        Устанавливает или изменяет статус активности продукта.
+        Устанавливает или изменяет статус активности продукта одним запросом UPDATE ... RETURNING.
 
         Параметры:
             - product_id (int): Уникальный идентификатор продукта.
@@ -111,29 +267,248 @@ class ProductService:
         Возвращает:
             Optional[Product]: Обновленный объект продукта или None, если продукт не найден.
         """
-        product = await Product.get_or_none(id=product_id)
-        if product:
-            product.is_active = is_active
-            await product.save()
-            return product
-        return None
+        rows = await Product._meta.db.execute_query_dict(
+            f"""
+            UPDATE "product" SET "is_active" = $2, "updated_at" = CURRENT_TIMESTAMP
+            WHERE "id" = $1 RETURNING {_returning_columns()}
+            """,
+            [product_id, is_active],
+        )
+        if rows:
+            await invalidate_products([product_id])
+        return Product._init_from_db(**rows[0]) if rows else None
 
     @staticmethod
     async def toggle_product_status(product_id: int) -> Optional[Product]:
         """
         Переключает статус активности продукта (активный/неактивный).
 
+        Переключение выполняется в БД выражением is_active = NOT is_active, поэтому одновременные
+        запросы не теряют изменений друг друга.
+
         Параметры:
             product_id (int): Уникальный идентификатор продукта для переключения статуса.
 
         Возвращает:
             Optional[Product]: Объект продукта с обновленным статусом или None, если продукт не найден.
         """
-        product = await Product.get_or_none(id=product_id)
-        if product:
-            product.is_active = not product.is_active
-            await product.save()
-            return product
-        return None
+        rows = await Product._meta.db.execute_query_dict(
+            f"""
+            UPDATE "product" SET "is_active" = NOT "is_active", "updated_at" = CURRENT_TIMESTAMP
+            WHERE "id" = $1 RETURNING {_returning_columns()}
+            """,
+            [product_id],
+        )
+        if rows:
+            await invalidate_products([product_id])
+        return Product._init_from_db(**rows[0]) if rows else None
+
+    @staticmethod
+    async def bulk_set_active_status(owner_id: int, is_active: bool, ids: Optional[List[int]] = None) -> int:
+        """
+        Устанавливает статус активности сразу для набора продуктов одним запросом UPDATE.
+
+        Владение проверяется в том же запросе: продукты других пользователей не затрагиваются.
+        Продукты, уже имеющие нужный статус, не перезаписываются.
+
+        Параметры:
+            - owner_id (int): ID владельца продуктов (текущий пользователь).
+            - is_active (bool): Статус активности для установки.
+            - ids (Optional[List[int]]): ID продуктов; если не указаны - все продукты владельца.
 
+        Возвращает:
+            int: Количество продуктов, статус которых изменился.
+        """
+        values = [is_active]
+        condition = _bulk_condition(owner_id, ids, values)
+        rows = await Product._meta.db.execute_query_dict(
+            f"""
+            UPDATE "product" SET "is_active" = $1, "updated_at" = CURRENT_TIMESTAMP
+            WHERE {condition} AND "is_active" <> $1
+            RETURNING "id"
+            """,
+            values,
+        )
+        await invalidate_products(row['id'] for row in rows)
+        return len(rows)
+
+    @staticmethod
+    async def bulk_delete_products(owner_id: int, ids: Optional[List[int]] = None) -> int:
+        """
+        Удаляет набор продуктов одним запросом DELETE, корректируя итоги корзин.
+
+        Владение проверяется в том же запросе: продукты других пользователей не удаляются.
+
+        Параметры:
+            - owner_id (int): ID владельца продуктов (текущий пользователь).
+            - ids (Optional[List[int]]): ID продуктов; если не указаны - все продукты владельца.
+
+        Возвращает:
+            int: Количество удаленных продуктов.
+        """
+        values = []
+        rows = await _delete_products(_bulk_condition(owner_id, ids, values), values)
+        await invalidate_products(row['id'] for row in rows)
+        return len(rows)
+
+    @staticmethod
+    async def import_products(
+            rows: AsyncIterator[Tuple[int, Union[dict, str]]],
+            owner_id: int,
+            chunk_size: int = PRODUCT_IMPORT_CHUNK_SIZE,
+            max_errors: int = PRODUCT_IMPORT_MAX_ERRORS) -> ProductImportResultSchema:
+        """
+        Массово создает продукты из потока строк.
+
+        Каждая строка проверяется схемой ProductCreateUpdateSchema; корректные строки записываются
+        пачками по chunk_size через COPY, поэтому память не зависит от размера входных данных.
+        Ошибочные строки не прерывают импорт, а попадают в отчет; если БД отклоняет пачку, она записывается
+        заново по одной строке. Ошибка формата потока останавливает разбор, но строки до нее импортируются
+        и попадают в отчет вместе с format_error. Отсутствующее описание сохраняется пустой строкой.
+        Продукты создаются неактивными, как и в create_product.
+
+        Параметры:
+            - rows (AsyncIterator[Tuple[int, Union[dict, str]]]): Номер строки и данные продукта
+              или текст ошибки разбора строки.
+            - owner_id (int): ID владельца продуктов.
+            - chunk_size (int, optional): Количество строк в одной операции COPY.
+            - max_errors (int, optional): Максимальное количество ошибок строк в отчете.
+
+        Возвращает:
+            ProductImportResultSchema: Количество созданных и отклоненных строк и ошибки строк.
+        """
+        result = ProductImportResultSchema()
+        chunk: List[tuple] = []
+        chunk_lines: List[int] = []
+
+        def report(line: int, errors: List[str]) -> None:
+            result.failed += 1
+            if len(result.errors) < max_errors:
+                result.errors.append(ProductImportErrorSchema(line=line, errors=errors))
+
+        async def flush() -> None:
+            try:
+                await ProductService._copy_products(chunk)
+                result.created += len(chunk)
+            except (asyncpg.PostgresError, IntegrityError) as e:
+                logger.error(f"Error importing products chunk, retrying row by row: {e}")
+                # COPY отклоняет пачку целиком: повторяем по одной строке, чтобы отклонить только ошибочные
+                for record, line in zip(chunk, chunk_lines):
+                    try:
+                        await ProductService._copy_products([record])
+                        result.created += 1
+                    except (asyncpg.PostgresError, IntegrityError) as row_error:
+                        report(line, [f"Database error: {row_error}"])
+            chunk.clear()
+            chunk_lines.clear()
+
+        try:
+            async for line, row in rows:
+                if isinstance(row, str):
+                    report(line, [row])
+                    continue
+                try:
+                    product_data = ProductCreateUpdateSchema.model_validate(row)
+                except ValidationError as e:
+                    report(line, [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()])
+                    continue
+                now = datetime.now(timezone.utc)
+                chunk.append((
+                    product_data.name, product_data.description or '', product_data.price, False, now, now, owner_id,
+                ))
+                chunk_lines.append(line)
+                if len(chunk) >= chunk_size:
+                    await flush()
+        except ImportFormatError as e:
+            result.format_error = str(e)
+        if chunk:
+            await flush()
+        return result
+
+    @staticmethod
+    async def _copy_products(records: List[tuple]) -> None:
+        """
+        Записывает пачку продуктов одной операцией COPY.
+        """
+        async with Product._meta.db.acquire_connection() as connection:
+            await connection.copy_records_to_table(
+                Product._meta.db_table,
+                records=records,
+                columns=['name', 'description', 'price', 'is_active', 'created_at', 'updated_at', 'owner_id'],
+            )
+
+    @staticmethod
+    async def export_products(
+            owner_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            batch_size: int = PRODUCT_EXPORT_BATCH_SIZE) -> AsyncIterator[List[asyncpg.Record]]:
+        """
+        Читает продукты пачками из серверного курсора БД.
+
+        В памяти одновременно находится не более batch_size строк, независимо от размера таблицы.
 
+        Параметры:
+            - owner_id (int, optional): Только продукты указанного владельца.
+            - is_active (bool, optional): Только активные (True) или неактивные (False) продукты.
+            - batch_size (int, optional): Количество строк в пачке.
+
+        Возвращает:
+            AsyncIterator[List[asyncpg.Record]]: Пачки строк, упорядоченные по id.
+        """
+        conditions, values = [], []
+        if owner_id is not None:
+            values.append(owner_id)
+            conditions.append(f'"owner_id" = ${len(values)}')
+        if is_active is not None:
+            values.append(is_active)
+            conditions.append(f'"is_active" = ${len(values)}')
+        columns = ', '.join(f'"{column}"' for column in EXPORT_COLUMNS)
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        query = f'SELECT {columns} FROM "{Product._meta.db_table}"{where} ORDER BY "id"'
+
+        async for batch in iter_query_batches(Product._meta.db, query, values, batch_size):
+            yield batch
+
+    @staticmethod
+    async def search_products(
+            query: str,
+            limit: int = 10,
+            after: Optional[Tuple[float, int]] = None) -> Tuple[List[dict], Optional[Tuple[float, int]]]:
+        """
+        Ищет активные продукты по названию и описанию с ранжированием.
+
+        Использует генерируемый столбец search_vector и его GIN-индекс. Совпадения в названии весят больше,
+        чем в описании. Результаты упорядочены по убыванию релевантности, затем по id; пагинация по ключу
+        (rank, id) последнего результата страницы.
+
+        Параметры:
+            - query (str): Поисковый запрос в синтаксисе websearch ("слова", "фраза в кавычках", -исключение).
+            - limit (int, optional): Максимальное количество результатов.
+            - after (Tuple[float, int], optional): Ключ (rank, id) последнего результата предыдущей страницы.
+
+        Возвращает:
+            Tuple[List[dict], Optional[Tuple[float, int]]]: Найденные продукты (id, name, description, price)
+            и ключ следующей страницы или None, если страница последняя.
+        """
+        after_rank, after_id = after if after is not None else (None, None)
+        rows = await Product._meta.db.execute_query_dict(
+            f"""
+            SELECT "id", "name", "description", "price", "rank" FROM (
+                SELECT "product"."id", "product"."name", "product"."description", "product"."price",
+                       ts_rank("product"."search_vector", search_query)::float8 AS "rank"
+                FROM "{Product._meta.db_table}" AS "product", websearch_to_tsquery('russian', $1) AS search_query
+                WHERE "product"."is_active" AND "product"."search_vector" @@ search_query
+            ) AS matches
+            WHERE $2::float8 IS NULL OR "rank" < $2::float8 OR ("rank" = $2::float8 AND "id" > $3::int)
+            ORDER BY "rank" DESC, "id"
+            LIMIT $4
+            """,
+            [query, after_rank, after_id, limit + 1],
+        )
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1]["rank"], rows[-1]["id"])
+        for row in rows:
+            del row["rank"]
+        return rows, next_key
@@ -0,0 +1,168 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Iterator
+
+from bb.core.config import (
+    AUTH_EMAIL_BURST, AUTH_EMAIL_RATE, AUTH_IP_BURST, AUTH_IP_RATE, AUTH_LIMITER_SIZE, AUTH_MAX_CONCURRENT_HASHES,
+    AUTH_OVERLOAD_RETRY_AFTER
+)
+
+
+class TokenBucketLimiter:
+    """
+    Набор корзин токенов по ключу (IP, email) в памяти процесса.
+
+    Каждый запрос забирает один токен; токены восполняются со скоростью rate до емкости burst.
+    Количество корзин ограничено maxsize: при переполнении вытесняется наиболее давно использованная.
+
+    Атрибуты:
+        - rate (float): Токенов в секунду. 0 отключает ограничение.
+        - burst (int): Емкость корзины. 0 отключает ограничение.
+        - maxsize (int): Максимальное количество корзин.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Забирает токен из корзины ключа.
+
+        Возвращает:
+            float: 0, если токен получен, иначе время в секундах до появления токена.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        entry = self._buckets.pop(key, None)
+        if entry is None:
+            tokens = float(self.burst)
+        else:
+            tokens, updated_at = entry
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class AdmissionRejected(Exception):
+    """
+    Запрос отклонен контролем допуска.
+
+    Атрибуты:
+        - reason (str): Причина: "overload", "ip" или "email".
+        - retry_after (float): Через сколько секунд имеет смысл повторить запрос.
+    """
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"Request rejected by admission control: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Контроль допуска для запросов, выполняющих bcrypt (логин и регистрация).
+
+    Сначала проверяется глобальный предел одновременно обрабатываемых запросов (токены при этом
+    не расходуются), затем корзины по IP и по email. Отказ происходит до обращения к БД и bcrypt,
+    поэтому всплеск подбора паролей не занимает процессор, нужный остальным эндпоинтам.
+
+    Атрибуты:
+        - ip_limiter (TokenBucketLimiter): Корзины по IP клиента.
+        - email_limiter (TokenBucketLimiter): Корзины по email.
+        - max_concurrent (int): Предел одновременно допущенных запросов (0 - без предела).
+        - overload_retry_after (float): Retry-After при превышении предела.
+    """
+
+    def __init__(
+            self, ip_limiter: TokenBucketLimiter, email_limiter: TokenBucketLimiter,
+            max_concurrent: int, overload_retry_after: float) -> None:
+        self.ip_limiter = ip_limiter
+        self.email_limiter = email_limiter
+        self.max_concurrent = max_concurrent
+        self.overload_retry_after = overload_retry_after
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = {"overload": 0, "ip": 0, "email": 0}
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        self.rejected[reason] += 1
+        raise AdmissionRejected(reason, retry_after)
+
+    @contextmanager
+    def admit(self, ip: str, email: str) -> Iterator[None]:
+        """
+        Допускает запрос или вызывает AdmissionRejected. Запрос считается выполняемым до выхода из блока.
+
+        Параметры:
+            - ip (str): IP клиента.
+            - email (str): Email из тела запроса.
+
+        Вызывает:
+            AdmissionRejected: Если превышен глобальный предел или исчерпана корзина IP или email.
+        """
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            self._reject("overload", self.overload_retry_after)
+        wait = self.ip_limiter.acquire(ip)
+        if wait:
+            self._reject("ip", wait)
+        wait = self.email_limiter.acquire(email.strip().lower())
+        if wait:
+            self._reject("email", wait)
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def clear(self) -> None:
+        """
+        Сбрасывает корзины (например, между тестами).
+        """
+        self.ip_limiter.clear()
+        self.email_limiter.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает количество допущенных и отклоненных по каждой причине запросов.
+        """
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "admitted": self.admitted,
+            "rejected_overload": self.rejected["overload"],
+            "rejected_ip": self.rejected["ip"],
+            "rejected_email": self.rejected["email"],
+            "tracked_ips": len(self.ip_limiter),
+            "tracked_emails": len(self.email_limiter),
+        }
+
+
+auth_admission = AdmissionController(
+    ip_limiter=TokenBucketLimiter(AUTH_IP_RATE, AUTH_IP_BURST, AUTH_LIMITER_SIZE),
+    email_limiter=TokenBucketLimiter(AUTH_EMAIL_RATE, AUTH_EMAIL_BURST, AUTH_LIMITER_SIZE),
+    max_concurrent=AUTH_MAX_CONCURRENT_HASHES,
+    overload_retry_after=AUTH_OVERLOAD_RETRY_AFTER,
+)
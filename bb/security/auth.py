@@ -1,22 +1,87 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from dotenv import load_dotenv
-import os
+from jose import JWTError
 
+from bb.core.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from bb.core.invalidation import invalidation_bus
+from bb.security.revocation import revocation_list
+from bb.security.tokens import token_codec
+from bb.service.cache import TTLCache
 from bb.users.models import User
 
-load_dotenv()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+# Значения claim "type": токен обновления нельзя использовать как токен доступа, и наоборот.
+TOKEN_TYPE_ACCESS = "access"
+TOKEN_TYPE_REFRESH = "refresh"
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# Кэш пользователей по subject токена (email), избавляет от запроса к БД на каждый запрос.
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+invalidation_bus.register("principal", evict=principal_cache.invalidate, flush=principal_cache.clear)
+
+
+async def invalidate_principal(*emails: str) -> None:
+    """
+    Удаляет пользователей из кэша get_current_user в текущем процессе и в остальных воркерах.
+
+    Вызывается при изменении или удалении пользователя.
+
+    Параметры:
+        emails (str): Email пользователей (subject токена).
+    """
+    await invalidation_bus.invalidate("principal", emails)
+
+
+def decode_token(token: str, token_type: str) -> dict:
+    """
+    Проверяет подпись и срок действия токена (через кэш token_codec) и его тип.
+
+    Токены доступа, выпущенные до появления claim "type", принимаются как токены доступа.
+
+    Параметры:
+        - token (str): Токен JWT.
+        - token_type (str): Ожидаемый тип: TOKEN_TYPE_ACCESS или TOKEN_TYPE_REFRESH.
+
+    Возвращает:
+        dict: Claims токена.
+
+    Вызывает:
+        JWTError: Если токен недействителен, просрочен, другого типа или без subject.
+    """
+    payload = token_codec.decode(token)
+    if payload.get("type", TOKEN_TYPE_ACCESS) != token_type:
+        raise JWTError(f"Expected {token_type} token")
+    if payload.get("sub") is None:
+        raise JWTError("Token has no subject")
+    return payload
+
+
+async def get_principal(email: str) -> Optional[User]:
+    """
+    Возвращает пользователя по subject токена (email) из кэша или из БД.
+
+    Параметры:
+        email (str): Email пользователя.
+
+    Возвращает:
+        Optional[User]: Пользователь или None, если он не найден.
+    """
+    user = principal_cache.get(email)
+    if user is None:
+        user = await User.get_or_none(email=email)
+        if user is not None:
+            principal_cache.set(email, user)
+    return user
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Получает текущего аутентифицированного пользователя по токену JWT.
+    Токены обновления и отозванные токены не принимаются.
 
     Параметры:
         token (str): Токен доступа JWT.
@@ -34,14 +99,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        payload = decode_token(token, TOKEN_TYPE_ACCESS)
     except JWTError:
         raise credentials_exception
+    if await revocation_list.is_revoked(payload):
+        raise credentials_exception
 
-    user = await User.get_or_none(email=username)
+    user = await get_principal(payload["sub"])
     if user is None:
         raise credentials_exception
     return user
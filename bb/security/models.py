@@ -0,0 +1,23 @@
+from tortoise import fields, models
+
+
+class RevokedToken(models.Model):
+    """
+    Модель отозванного токена.
+
+    Хранит идентификаторы (jti) токенов, отозванных до истечения срока действия. Записи с истекшим
+    expires_at больше не нужны: такой токен отклоняется и без отзыва.
+
+    Атрибуты:
+        - id (int): Уникальный идентификатор записи.
+        - jti (str): Идентификатор токена (claim "jti").
+        - expires_at (datetime): Срок действия отозванного токена (claim "exp").
+        - revoked_at (datetime): Дата и время отзыва; по нему воркеры догружают новые отзывы.
+    """
+    id = fields.BigIntField(pk=True)
+    jti = fields.CharField(max_length=64, unique=True)
+    expires_at = fields.DatetimeField(index=True)
+    revoked_at = fields.DatetimeField(auto_now_add=True, index=True)
+
+    def __str__(self) -> str:
+        return self.jti
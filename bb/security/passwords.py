@@ -0,0 +1,151 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import bcrypt
+
+from bb.core.config import PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS
+
+
+def _hash_password(raw_password: str, rounds: int) -> Tuple[str, float]:
+    """
+    Хэширует пароль в рабочем потоке/процессе.
+
+    Возвращает:
+        Tuple[str, float]: Хэш пароля и время вычисления в секундах.
+    """
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(raw_password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    return hashed, time.perf_counter() - started
+
+
+def _verify_password(raw_password: str, hashed_password: str) -> Tuple[bool, float]:
+    """
+    Проверяет пароль в рабочем потоке/процессе.
+
+    Возвращает:
+        Tuple[bool, float]: Результат проверки и время вычисления в секундах.
+    """
+    started = time.perf_counter()
+    matches = bcrypt.checkpw(raw_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return matches, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в ограниченном пуле потоков или процессов, не блокируя цикл событий.
+
+    Размер пула ограничивает число одновременных вычислений, остальные запросы ждут в очереди пула.
+
+    Атрибуты:
+        - executor_type (str): Тип пула: "thread" или "process".
+        - workers (int): Размер пула.
+        - rounds (int): Стоимость bcrypt (log2 числа раундов).
+    """
+
+    def __init__(self, executor_type: str = "thread", workers: int = 1, rounds: int = 12) -> None:
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor_type}")
+        self.executor_type = executor_type
+        self.workers = max(1, workers)
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._operations = 0
+        self._total_latency = 0.0
+        self._total_wait = 0.0
+        self._max_latency = 0.0
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество операций, отправленных в пул и еще не завершенных.
+        """
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Количество операций, ожидающих свободного исполнителя.
+        """
+        return max(0, self._pending - self.workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self._pending += 1
+        try:
+            result, elapsed = await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+        latency = time.perf_counter() - started
+        self._operations += 1
+        self._total_latency += latency
+        self._total_wait += max(0.0, latency - elapsed)
+        self._max_latency = max(self._max_latency, latency)
+        return result
+
+    async def hash(self, raw_password: str) -> str:
+        """
+        Хэширует пароль.
+
+        Параметры:
+            raw_password (str): Нешифрованный пароль.
+
+        Возвращает:
+            str: bcrypt-хэш пароля.
+        """
+        return await self._run(_hash_password, raw_password, self.rounds)
+
+    async def verify(self, raw_password: str, hashed_password: str) -> bool:
+        """
+        Проверяет пароль по bcrypt-хэшу.
+
+        Параметры:
+            raw_password (str): Нешифрованный пароль для проверки.
+            hashed_password (str): Сохраненный bcrypt-хэш.
+
+        Возвращает:
+            bool: True, если пароль верный, иначе False.
+        """
+        return await self._run(_verify_password, raw_password, hashed_password)
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики пула: глубину очереди и задержки операций.
+        """
+        operations = self._operations
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "operations": operations,
+            "avg_latency_ms": round(self._total_latency / operations * 1000, 3) if operations else 0.0,
+            "avg_wait_ms": round(self._total_wait / operations * 1000, 3) if operations else 0.0,
+            "max_latency_ms": round(self._max_latency * 1000, 3),
+        }
+
+    def shutdown(self) -> None:
+        """
+        Останавливает пул исполнителей.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    rounds=PASSWORD_HASH_ROUNDS,
+)
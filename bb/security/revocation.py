@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from bb.core.config import REVOCATION_FILTER_CAPACITY, REVOCATION_FILTER_ERROR_RATE, REVOCATION_REFRESH_INTERVAL
+from bb.security.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Догрузка берет отзывы с revoked_at не раньше этого окна до последнего прочитанного: revoked_at ставится
+# по часам отзывающего воркера, поэтому запись с меньшим revoked_at может появиться в БД позже уже прочитанной.
+REFRESH_LOOKBACK = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для строк: проверка принадлежности без ложноотрицательных ответов.
+
+    Размер битового массива и количество хэш-функций рассчитываются по ожидаемому количеству
+    элементов и допустимой доле ложноположительных ответов. Позиции битов получаются двойным
+    хэшированием одного дайджеста blake2b.
+
+    Атрибуты:
+        - capacity (int): Ожидаемое количество элементов.
+        - size (int): Количество битов.
+        - hashes (int): Количество хэш-функций.
+        - count (int): Количество добавленных элементов.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * step) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> bool:
+        """
+        Добавляет элемент.
+
+        Возвращает:
+            bool: True, если элемента (вероятно) еще не было в фильтре.
+        """
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Отозванные токены: таблица RevokedToken и ее копия в фильтре Блума в памяти процесса.
+
+    Проверка токена, которого нет в фильтре, не обращается к БД; в БД проверяются только
+    положительные ответы фильтра. Фильтр загружается при старте и догружается новыми отзывами
+    из БД в фоне не чаще раза в refresh_interval, поэтому отзыв в другом воркере вступает в силу
+    с этой задержкой. Отзыв в текущем воркере попадает в фильтр сразу.
+
+    При заполнении фильтра сверх capacity он перестраивается заново, а записи об истекших
+    токенах удаляются из таблицы.
+
+    Атрибуты:
+        - capacity (int): Ожидаемое количество действующих отозванных токенов.
+        - error_rate (float): Доля ложноположительных ответов фильтра при capacity элементах.
+        - refresh_interval (float): Интервал догрузки отзывов из БД, с.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_interval: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.filter_hits = 0
+        self.false_positives = 0
+        self.refreshes = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Сбрасывает фильтр; при следующей проверке он будет загружен из БД заново.
+        """
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        self._loaded = False
+        self._since: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _add(self, rows: Iterable[tuple]) -> None:
+        for jti, revoked_at in rows:
+            self._filter.add(jti)
+            if self._since is None or revoked_at > self._since:
+                self._since = revoked_at
+
+    async def load(self) -> None:
+        """
+        Удаляет из БД записи об истекших токенах и строит фильтр по оставшимся.
+        """
+        now = datetime.now(timezone.utc)
+        await RevokedToken.filter(expires_at__lte=now).delete()
+        rows = await RevokedToken.filter(expires_at__gt=now).values_list("jti", "revoked_at")
+        self._filter = BloomFilter(max(self.capacity, len(rows) * 2), self.error_rate)
+        self._since = None
+        self._add(rows)
+        self._loaded = True
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    async def refresh(self) -> None:
+        """
+        Догружает в фильтр отзывы, сделанные после предыдущей загрузки (в том числе в других воркерах).
+        """
+        if not self._loaded or self._filter.count >= self._filter.capacity:
+            await self.load()
+            return
+        query = RevokedToken.all()
+        if self._since is not None:
+            query = query.filter(revoked_at__gt=self._since - REFRESH_LOOKBACK)
+        self._add(await query.values_list("jti", "revoked_at"))
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Failed to refresh the token revocation list")
+
+    async def is_revoked(self, claims: dict) -> bool:
+        """
+        Проверяет, отозван ли токен. Токены без claim "jti" не отзываются.
+
+        Параметры:
+            claims (dict): Claims проверенного токена.
+
+        Возвращает:
+            bool: True, если токен отозван.
+        """
+        jti = claims.get("jti")
+        if jti is None:
+            return False
+        if not self._loaded:
+            await self.load()
+        elif time.monotonic() - self._refreshed_at >= self.refresh_interval and (
+                self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_in_background())
+        if jti not in self._filter:
+            return False
+        self.filter_hits += 1
+        revoked = await RevokedToken.exists(jti=jti)
+        self.false_positives += not revoked
+        return revoked
+
+    async def revoke(self, *claims: dict) -> None:
+        """
+        Отзывает токены до истечения их срока действия одним запросом к БД.
+
+        Параметры:
+            claims (dict): Claims проверенных токенов; токены без "jti" или "exp" пропускаются.
+        """
+        tokens = [
+            RevokedToken(jti=token["jti"], expires_at=datetime.fromtimestamp(token["exp"], timezone.utc))
+            for token in claims if "jti" in token and "exp" in token
+        ]
+        if not tokens:
+            return
+        await RevokedToken.bulk_create(tokens, ignore_conflicts=True)
+        for token in tokens:
+            self._filter.add(token.jti)
+
+    async def revoke_once(self, claims: dict) -> bool:
+        """
+        Атомарно отзывает токен, если он еще не отозван (INSERT ... ON CONFLICT DO NOTHING RETURNING).
+
+        Используется для одноразовых токенов (ротация токенов обновления): из нескольких одновременных
+        запросов с одним токеном успешным будет ровно один, независимо от воркера и состояния фильтра.
+
+        Параметры:
+            claims (dict): Claims проверенного токена.
+
+        Возвращает:
+            bool: True, если токен отозван этим вызовом; False, если он уже был отозван или его нельзя
+            отозвать (нет "jti" или "exp").
+        """
+        if "jti" not in claims or "exp" not in claims:
+            return False
+        rows = await RevokedToken._meta.db.execute_query_dict(
+            f"""
+            INSERT INTO "{RevokedToken._meta.db_table}" ("jti", "expires_at", "revoked_at") VALUES ($1, $2, $3)
+            ON CONFLICT ("jti") DO NOTHING
+            RETURNING "jti"
+            """,
+            [claims["jti"], datetime.fromtimestamp(claims["exp"], timezone.utc), datetime.now(timezone.utc)],
+        )
+        self._filter.add(claims["jti"])
+        return bool(rows)
+
+    def stats(self) -> dict:
+        """
+        Возвращает заполненность фильтра, количество обращений к БД и ложноположительных ответов.
+        """
+        return {
+            "loaded": self._loaded,
+            "entries": self._filter.count,
+            "capacity": self._filter.capacity,
+            "bits": self._filter.size,
+            "hashes": self._filter.hashes,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+            "refreshes": self.refreshes,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=REVOCATION_FILTER_CAPACITY,
+    error_rate=REVOCATION_FILTER_ERROR_RATE,
+    refresh_interval=REVOCATION_REFRESH_INTERVAL,
+)
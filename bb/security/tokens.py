@@ -0,0 +1,118 @@
+import hashlib
+import time
+from typing import Optional
+
+from jose import jwk, jwt, JWTError
+from jose.constants import ALGORITHMS
+
+from bb.core.config import (
+    ALGORITHM, JWT_PRIVATE_KEY_FILE, JWT_PUBLIC_KEY_FILE, SECRET_KEY, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
+)
+from bb.service.cache import TTLCache
+
+
+class TokenCodec:
+    """
+    Выпуск и проверка токенов JWT с заранее подготовленными ключами и кэшем проверенных токенов.
+
+    Ключи разбираются один раз при создании кодека, а не при каждом вызове jwt.encode/jwt.decode.
+    Для асимметричных алгоритмов (RS*, ES*) кодек без закрытого ключа только проверяет токены:
+    такие воркеры не хранят ключ подписи.
+
+    Claims проверенного токена кэшируются по SHA-256 токена до его exp (но не дольше ttl кэша),
+    поэтому повторные запросы с тем же токеном не проверяют подпись заново.
+
+    Атрибуты:
+        - algorithm (str): Алгоритм подписи, например HS256, RS256 или ES256.
+        - cache (TTLCache): Кэш claims проверенных токенов.
+    """
+
+    def __init__(
+            self, algorithm: str, signing_key: Optional[str] = None, verification_key: Optional[str] = None,
+            cache_size: int = 0, cache_ttl: float = 0) -> None:
+        self.algorithm = algorithm
+        self._signing_key = jwk.construct(signing_key, algorithm) if signing_key else None
+        if verification_key:
+            self._verification_key = jwk.construct(verification_key, algorithm)
+        elif self._signing_key is not None:
+            self._verification_key = (
+                self._signing_key if algorithm in ALGORITHMS.HMAC else self._signing_key.public_key()
+            )
+        else:
+            raise ValueError(f"No key configured for {algorithm} tokens")
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @property
+    def can_sign(self) -> bool:
+        return self._signing_key is not None
+
+    def encode(self, claims: dict) -> str:
+        """
+        Подписывает claims.
+
+        Параметры:
+            claims (dict): Claims токена; datetime в exp преобразуется в метку времени.
+
+        Возвращает:
+            str: Токен JWT.
+
+        Вызывает:
+            JWTError: Если у кодека нет ключа подписи.
+        """
+        if self._signing_key is None:
+            raise JWTError("Token codec is verify-only")
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        """
+        Проверяет подпись и срок действия токена и возвращает его claims.
+
+        Возвращаемый словарь может быть общим для всех проверок одного токена, его нельзя изменять.
+
+        Параметры:
+            token (str): Токен JWT.
+
+        Возвращает:
+            dict: Claims токена.
+
+        Вызывает:
+            JWTError: Если токен недействителен или просрочен.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self.cache.get(digest)
+        if claims is not None:
+            return claims
+        claims = jwt.decode(token, self._verification_key, algorithms=[self.algorithm])
+        expires_in = claims["exp"] - time.time() if "exp" in claims else self.cache.ttl
+        if expires_in > 0:
+            self.cache.set(digest, claims, min(expires_in, self.cache.ttl))
+        return claims
+
+    def stats(self) -> dict:
+        """
+        Возвращает алгоритм, наличие ключа подписи и статистику кэша проверенных токенов.
+        """
+        return {"algorithm": self.algorithm, "can_sign": self.can_sign, **self.cache.stats()}
+
+
+def _read_key(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def create_token_codec() -> TokenCodec:
+    """
+    Создает кодек по настройкам: SECRET_KEY для HS*, PEM-файлы JWT_PRIVATE_KEY_FILE и JWT_PUBLIC_KEY_FILE
+    для асимметричных алгоритмов.
+    """
+    if ALGORITHM in ALGORITHMS.HMAC:
+        return TokenCodec(ALGORITHM, SECRET_KEY, cache_size=TOKEN_CACHE_SIZE, cache_ttl=TOKEN_CACHE_TTL)
+    return TokenCodec(
+        ALGORITHM, _read_key(JWT_PRIVATE_KEY_FILE), _read_key(JWT_PUBLIC_KEY_FILE),
+        cache_size=TOKEN_CACHE_SIZE, cache_ttl=TOKEN_CACHE_TTL,
+    )
+
+
+token_codec = create_token_codec()
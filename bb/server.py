@@ -0,0 +1,95 @@
+"""
+Production-запуск приложения: несколько воркеров uvicorn, uvloop, httptools.
+
+Пример:
+    python -m bb.server --workers 4 --db-connection-budget 80
+
+Значения по умолчанию берутся из переменных окружения SERVER_* (см. bb.core.config).
+Схема БД должна быть применена миграциями aerich: если DB_GENERATE_SCHEMAS не задана явно,
+воркеры стартуют без generate_schemas.
+"""
+import argparse
+import logging
+import os
+from typing import List, Optional
+
+import uvicorn
+
+# Настройка логгера
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Аргумент командной строки -> переменная окружения, которую он переопределяет
+ENV_OVERRIDES = {
+    "host": "SERVER_HOST",
+    "port": "SERVER_PORT",
+    "workers": "SERVER_WORKERS",
+    "loop": "SERVER_LOOP",
+    "http": "SERVER_HTTP",
+    "keep_alive": "SERVER_KEEP_ALIVE",
+    "graceful_shutdown_timeout": "SERVER_GRACEFUL_SHUTDOWN_TIMEOUT",
+    "backlog": "SERVER_BACKLOG",
+    "db_connection_budget": "DB_CONNECTION_BUDGET",
+}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки. Не указанный аргумент остается None и берется из окружения.
+    """
+    parser = argparse.ArgumentParser(description="Production-запуск BigBazar.")
+    parser.add_argument("--host", help="Адрес прослушивания (SERVER_HOST).")
+    parser.add_argument("--port", type=int, help="Порт (SERVER_PORT).")
+    parser.add_argument("--workers", type=int, help="Количество процессов-воркеров (SERVER_WORKERS).")
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], help="Цикл событий (SERVER_LOOP).")
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], help="HTTP-парсер (SERVER_HTTP).")
+    parser.add_argument("--keep-alive", type=int, help="Таймаут keep-alive в секундах (SERVER_KEEP_ALIVE).")
+    parser.add_argument(
+        "--graceful-shutdown-timeout", type=int,
+        help="Ожидание завершения запросов при остановке в секундах (SERVER_GRACEFUL_SHUTDOWN_TIMEOUT).",
+    )
+    parser.add_argument("--backlog", type=int, help="Очередь входящих соединений (SERVER_BACKLOG).")
+    parser.add_argument(
+        "--db-connection-budget", type=int,
+        help="Общее число соединений с БД на все воркеры (DB_CONNECTION_BUDGET).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Запускает uvicorn с параметрами из командной строки и окружения.
+
+    Аргументы командной строки записываются в окружение до импорта настроек, поэтому главный процесс
+    и все воркеры (которые наследуют окружение) получают одинаковую конфигурацию, включая размер
+    пула соединений на воркер, рассчитанный из DB_CONNECTION_BUDGET.
+    """
+    args = parse_args(argv)
+    for name, env_name in ENV_OVERRIDES.items():
+        value = getattr(args, name)
+        if value is not None:
+            os.environ[env_name] = str(value)
+    os.environ.setdefault("DB_GENERATE_SCHEMAS", "false")
+
+    from bb.core import config
+
+    logger.info(
+        "Starting %s worker(s) on %s:%s, loop=%s, http=%s, DB pool per worker: %s-%s",
+        config.SERVER_WORKERS, config.SERVER_HOST, config.SERVER_PORT, config.SERVER_LOOP, config.SERVER_HTTP,
+        config.DB_POOL_MIN_SIZE, config.DB_POOL_MAX_SIZE,
+    )
+    uvicorn.run(
+        "bb.main:app",
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=config.SERVER_WORKERS,
+        loop=config.SERVER_LOOP,
+        http=config.SERVER_HTTP,
+        timeout_keep_alive=config.SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=config.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+        backlog=config.SERVER_BACKLOG,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Внутрипроцессный LRU-кэш с ограничением времени жизни записей.
+
+    Атрибуты:
+        - maxsize (int): Максимальное количество записей. 0 отключает кэш.
+        - ttl (float): Время жизни записи в секундах. 0 отключает кэш.
+        - hits (int): Количество попаданий.
+        - misses (int): Количество промахов.
+        - generation (int): Счетчик инвалидаций. Значение, прочитанное из источника до инвалидации,
+          не записывается в кэш, если при set передано поколение, полученное до чтения.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу или default, если записи нет или она устарела.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None) -> None:
+        """
+        Сохраняет значение, вытесняя самые давно использованные записи при переполнении.
+
+        Параметры:
+            - key (Hashable): Ключ записи.
+            - value (Any): Значение.
+            - ttl (float, optional): Время жизни записи, если отличается от ttl кэша.
+            - generation (int, optional): Поколение кэша перед чтением значения из источника; если с тех пор
+              была инвалидация, значение могло устареть и не сохраняется.
+        """
+        if not self.enabled or (generation is not None and generation != self.generation):
+            return
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Удаляет запись по ключу, если она есть.
+        """
+        self._data.pop(key, None)
+        self.generation += 1
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        """
+        self._data.clear()
+        self.generation += 1
+
+    def stats(self) -> dict:
+        """
+        Возвращает размер кэша и счетчики попаданий/промахов.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
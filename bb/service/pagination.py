@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Any, Tuple
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирует значения ключа последней записи страницы в непрозрачный курсор.
+
+    Параметры:
+        - values: Значения ключа сортировки, например id.
+
+    Возвращает:
+        str: Курсор в виде URL-safe base64 без выравнивания.
+    """
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """
+    Декодирует курсор, созданный encode_cursor, и проверяет типы значений.
+
+    Параметры:
+        - cursor (str): Курсор из запроса.
+        - types: Ожидаемые типы значений ключа.
+
+    Возвращает:
+        Tuple: Значения ключа сортировки.
+
+    Вызывает:
+        ValueError: Если курсор поврежден или не соответствует ожидаемым типам.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(type(value) is expected for value, expected in zip(values, types))
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(values)
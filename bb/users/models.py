@@ -1,5 +1,6 @@
 from tortoise import fields, models
-import bcrypt
+
+from bb.security.passwords import password_hasher
 
 
 class User(models.Model):
@@ -16,8 +17,8 @@ class User(models.Model):
 
     Методы:
         __str__(self) -> str: Возвращает e-mail пользователя в виде строки.
-        set_password(self, raw_password: str) -> None: Хэширует и устанавливает пароль пользователя.
-        check_password(self, raw_password: str) -> bool: Проверяет пароль пользователя.
+        set_password(self, raw_password: str) -> None: Асинхронно хэширует и устанавливает пароль пользователя.
+        check_password(self, raw_password: str) -> bool: Асинхронно проверяет пароль пользователя.
         create_user(cls, name: str, email: str, phone: str, password: str) -> 'User':
             Создает и сохраняет нового пользователя в базе данных.
     PydanticMeta:
@@ -40,29 +41,30 @@ class User(models.Model):
         """
         return self.email
 
-    def set_password(self, raw_password):
+    async def set_password(self, raw_password):
         """
         Хэширует и устанавливает пароль пользователя.
 
+        Хэширование выполняется в пуле password_hasher, а не в цикле событий.
+
         Параметры:
             raw_password (str): Нешифрованный пароль пользователя.
         """
-        raw_password = raw_password.encode('utf-8')  # Преобразование пароля в байты
-        salt = bcrypt.gensalt()
-        self.password = bcrypt.hashpw(raw_password, salt)
+        self.password = await password_hasher.hash(raw_password)
 
-    def check_password(self, raw_password):
+    async def check_password(self, raw_password):
         """
         Проверяет пароль пользователя.
 
+        Проверка выполняется в пуле password_hasher, а не в цикле событий.
+
         Параметры:
             raw_password (str): Нешифрованный пароль для проверки.
 
         Возвращает:
             bool: Возвращает True, если пароль верный, иначе False.
         """
-        raw_password = raw_password.encode('utf-8')  # Преобразование пароля в байты
-        return bcrypt.checkpw(raw_password, self.password.encode('utf-8'))
+        return await password_hasher.verify(raw_password, self.password)
 
     @classmethod
     async def create_user(cls, name: str, email: str, phone: str, password: str) -> 'User':
@@ -79,6 +81,6 @@ class User(models.Model):
             User: Экземпляр созданного пользователя.
         """
         user = cls(name=name, email=email, phone=phone)
-        user.set_password(password)
+        await user.set_password(password)
         await user.save()
         return user
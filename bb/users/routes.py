@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from typing import List, Union
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, Union
 
 from pydantic import BaseModel
 
 from .models import User
-from .schemas import UserRegistration, UserLogin, UserPartialUpdateSchema, Token, UserRetrieveSchema
+from .schemas import (
+    UserRegistration, UserLogin, UserPartialUpdateSchema, Token, UserRetrieveSchema, UserPageSchema, RefreshTokenSchema
+)
+from ..core.responses import ORJSONResponse, ndjson_chunks
 from .services import UserService
+from ..products.services import ProductService
+from ..security.admission import AdmissionRejected, auth_admission
+from ..security.auth import TOKEN_TYPE_ACCESS, decode_token, get_current_user, invalidate_principal, oauth2_scheme
 from ..service.constants import ERROR_USER_NOT_FOUND
+from ..service.pagination import encode_cursor, decode_cursor
 
 users_router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 class ErrorResponse(BaseModel):
@@ -23,8 +31,26 @@ class ErrorResponse(BaseModel):
     message: str
 
 
+def client_ip(request: Request) -> str:
+    """
+    IP клиента для контроля допуска. За прокси uvicorn берет его из X-Forwarded-For (--forwarded-allow-ips).
+    """
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(rejection: AdmissionRejected) -> HTTPException:
+    """
+    Ответ 429 с заголовком Retry-After для отклоненного контролем допуска запроса.
+    """
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(rejection.retry_after)))},
+    )
+
+
 @users_router.post("/register", response_model=UserRetrieveSchema, summary="Register a new user.")
-async def register(user_data: UserRegistration) -> UserRetrieveSchema:
+async def register(user_data: UserRegistration, request: Request) -> UserRetrieveSchema:
     """
     Зарегистрировать нового пользователя и возвращать зарегистрированные данные.
 
@@ -34,6 +60,8 @@ async def register(user_data: UserRegistration) -> UserRetrieveSchema:
         - Телефон должен удовлетворять маске: начинаться с +7 после чего идет 10 цифр.
         - Телефон и e-mail: уникальные значения.
 
+    Частота регистраций ограничена по IP и email, при перегрузке возвращается 429 с заголовком Retry-After.
+
     Параметры:
     - user_data (UserRegistration): Данные нового пользователя.
 
@@ -44,17 +72,22 @@ async def register(user_data: UserRegistration) -> UserRetrieveSchema:
         UserRetrieveSchema:: Данные зарегистрированного пользователя.
     """
     try:
-        user = await UserService.register_user(user_data)
+        with auth_admission.admit(client_ip(request), user_data.email):
+            user = await UserService.register_user(user_data)
         return user
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @users_router.post("/login", response_model=Token, summary="Authenticate user.")
-async def login(login_data: UserLogin) -> Union[Token, ErrorResponse]:
+async def login(login_data: UserLogin, request: Request) -> Union[Token, ErrorResponse]:
     """
     Аутентифицировать пользователя и вернуть токен доступа.
 
+    Частота попыток ограничена по IP и email, при перегрузке возвращается 429 с заголовком Retry-After.
+
     Параметры:
         login_data (UserLogin): Данные для входа пользователя.
 
@@ -63,25 +96,90 @@ async def login(login_data: UserLogin) -> Union[Token, ErrorResponse]:
         ErrorResponse: Ошибка с сообщением о неверных учетных данных.
     """
     try:
-        token = await UserService.authenticate_user(login_data)
+        with auth_admission.admit(client_ip(request), login_data.email):
+            token = await UserService.authenticate_user(login_data)
         if token:
             return token
         else:
             return ErrorResponse(message="Invalid credentials.")
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except ValueError as e:
         return ErrorResponse(message=str(e))
 
 
-@users_router.get("/list", response_model=List[UserRetrieveSchema], summary="Get a list of all users.")
-async def get_users() -> List[UserRetrieveSchema]:
+@users_router.post("/token/refresh", response_model=Token, summary="Refresh access token.")
+async def refresh_token(data: RefreshTokenSchema) -> Token:
     """
-    Получить список всех пользователей.
+    Выпустить новый токен доступа по токену обновления, без повторного ввода пароля.
+
+    При включенной ротации (REFRESH_TOKEN_ROTATION) выдается и новый токен обновления,
+    иначе возвращается переданный.
+
+    Параметры:
+        data (RefreshTokenSchema): Токен обновления.
 
     Возвращает:
-    - List[User]: Список всех пользователей.
+        Token: Новый токен доступа и токен обновления.
+    """
+    token = await UserService.refresh_tokens(data.refresh_token)
+    if token is None:
+        raise HTTPException(
+            status_code=401, detail="Invalid refresh token", headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token
+
+
+@users_router.post("/logout", response_model=dict, summary="Revoke tokens.")
+async def logout(
+        data: Optional[RefreshTokenSchema] = None, token: str = Depends(oauth2_scheme),
+        current_user=Depends(get_current_user)) -> dict:
     """
-    users = await User.all()
-    return [UserRetrieveSchema.model_construct(**user.__dict__) for user in users]
+    Выйти: отозвать текущий токен доступа и, если передан, токен обновления.
+
+    Отозванные токены не принимаются до истечения их срока действия во всех воркерах
+    (в других - с задержкой до REVOCATION_REFRESH_INTERVAL).
+
+    Параметры:
+        data (RefreshTokenSchema, optional): Токен обновления для отзыва.
+
+    Возвращает:
+        dict: Сообщение об успешном выходе.
+    """
+    await UserService.logout(decode_token(token, TOKEN_TYPE_ACCESS), data.refresh_token if data else None)
+    return {"message": "Logged out successfully"}
+
+
+@users_router.get("/list", response_model=UserPageSchema, summary="Get a list of users.")
+async def get_users(
+        limit: int = Query(100, gt=0, le=1000),
+        after: Optional[str] = Query(None, description="Курсор next_cursor предыдущей страницы."),
+        stream: bool = Query(False, description="Выдать всех пользователей потоком NDJSON."),
+) -> Union[UserPageSchema, StreamingResponse]:
+    """
+    Получить список пользователей.
+
+    По умолчанию возвращает страницу с пагинацией по курсору: для следующей страницы передайте
+    next_cursor из ответа в параметре after. С stream=true выдает всех пользователей потоком NDJSON,
+    читая их из БД пачками; limit и after при этом не используются.
+
+    Возвращает:
+    - UserPageSchema: Страница пользователей и курсор следующей страницы.
+    - StreamingResponse: Поток NDJSON, если stream=true.
+    """
+    if stream:
+        return StreamingResponse(ndjson_chunks(UserService.iter_users()), media_type="application/x-ndjson")
+    after_id = None
+    if after is not None:
+        try:
+            after_id, = decode_cursor(after, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    users, last_id = await UserService.get_users_page(limit, after_id)
+    return ORJSONResponse({
+        "items": users,
+        "next_cursor": encode_cursor(last_id) if last_id is not None else None,
+    })
 
 
 @users_router.get("/{user_id}", response_model=UserRetrieveSchema, summary="Get user by ID.")
@@ -118,14 +216,16 @@ async def update_user(user_id: int, user_data: UserPartialUpdateSchema) -> Union
     """
     user = await User.get_or_none(id=user_id)
     if user:
+        previous_email = user.email
         # Обновление только предоставленных полей
         user_data_dict = user_data.model_dump(exclude_unset=True)
         for key, value in user_data_dict.items():
             if key == 'password':
-                user.set_password(value)  # Хеширование пароля перед его сохранением
+                await user.set_password(value)  # Хеширование пароля перед его сохранением
             else:
                 setattr(user, key, value)
         await user.save()
+        await invalidate_principal(*{previous_email, user.email})
         return UserRetrieveSchema.model_construct(**user.__dict__)
     else:
         raise HTTPException(status_code=404, detail={"message": ERROR_USER_NOT_FOUND})
@@ -136,6 +236,9 @@ async def delete_user(user_id: int) -> dict:
     """
     Удалить пользователя по ID.
 
+    Продукты пользователя удаляются до него через ProductService, чтобы итоги корзин других
+    пользователей и кэш продуктов остались согласованными (каскадное удаление их не обновляет).
+
     Параметры:
     - user_id (int): ID пользователя для удаления.
 
@@ -147,7 +250,9 @@ async def delete_user(user_id: int) -> dict:
     """
     user = await User.get_or_none(id=user_id)
     if user:
+        await ProductService.bulk_delete_products(user.id)
         await user.delete()
+        await invalidate_principal(user.email)
         return {"message": "User deleted successfully"}
     else:
         raise HTTPException(status_code=404, detail=ErrorResponse(message=ERROR_USER_NOT_FOUND))
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, ClassVar
+from typing import List, Optional, ClassVar
 
 from pydantic import BaseModel, EmailStr, Field
 from tortoise.contrib.pydantic import pydantic_model_creator
@@ -9,6 +9,8 @@ from .models import User
 
 # Схема для чтения данных пользователя
 UserRetrieveSchema = pydantic_model_creator(User, name="User")
+# Поля, выбираемые из БД для списков пользователей (.values()), - без хэша пароля
+USER_LIST_FIELDS = tuple(UserRetrieveSchema.model_fields)
 
 
 class UserBase(BaseModel):
@@ -112,3 +114,25 @@ class UserPartialUpdateSchema(UserBase):
         from_attributes = True
 
     Config: ClassVar[Config]  # Аннотация, указывающая, что это не поле модели
+
+
+class RefreshTokenSchema(BaseModel):
+    """
+    Pydantic-модель схемы запроса обновления токенов.
+
+    Атрибуты:
+        refresh_token (str): Токен обновления, полученный при входе или предыдущем обновлении.
+    """
+    refresh_token: str
+
+
+class UserPageSchema(BaseModel):
+    """
+    Pydantic-модель схемы страницы списка пользователей.
+
+    Атрибуты:
+        items (List[UserRetrieveSchema]): Пользователи на странице.
+        next_cursor (Optional[str]): Курсор следующей страницы или None, если страница последняя.
+    """
+    items: List[UserRetrieveSchema]
+    next_cursor: Optional[str] = None
@@ -1,25 +1,23 @@
 import re
-import os
 import logging
+import uuid
 
 from tortoise.exceptions import IntegrityError
-import bcrypt
-from typing import Union
+from typing import AsyncIterator, List, Optional, Tuple, Union
 from .models import User
-from .schemas import UserLogin, Token, UserRegistration
-from dotenv import load_dotenv
-from jose import jwt
+from ..core.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_ROTATION, USER_STREAM_BATCH_SIZE
+)
+from ..core.database import iter_query_batches
+from ..security.auth import TOKEN_TYPE_ACCESS, TOKEN_TYPE_REFRESH, decode_token, get_principal
+from ..security.passwords import password_hasher
+from ..security.revocation import revocation_list
+from ..security.tokens import token_codec
+from .schemas import UserLogin, Token, UserRegistration, USER_LIST_FIELDS
+from jose import JWTError
 from datetime import datetime, timedelta
 
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
-REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES"))
-
-
 class UserService:
     @staticmethod
     async def register_user(user_data: UserRegistration) -> User:
@@ -51,7 +49,7 @@ class UserService:
         if not re.match(r'^\+7\d{10}$', user_data.phone):
             raise ValueError("Phone must start with +7 and have 10 digits.")
 
-        hashed_password = bcrypt.hashpw(user_data.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await password_hasher.hash(user_data.password)
 
         try:
             user = await User.create(
@@ -82,20 +80,128 @@ class UserService:
             None: Если аутентификация не удалась.
         """
         user = await User.get_or_none(email=login_data.email)
-        if user and user.check_password(login_data.password):
-            access_token = UserService.create_access_token(data={"sub": user.email}, expires_delta=timedelta(
-                minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-            refresh_token = UserService.create_refresh_token(data={"sub": user.email}, expires_delta=timedelta(
-                minutes=REFRESH_TOKEN_EXPIRE_MINUTES))
-            return Token(
-                access_token=access_token,
-                refresh_token=refresh_token,
-                token_type="bearer"
-            )
+        if user and await user.check_password(login_data.password):
+            return UserService.issue_tokens(user.email)
         else:
             logging.warning(f"Authentication failed for {login_data.email}")
             return None
 
+    @staticmethod
+    def issue_tokens(email: str, refresh_token: Optional[str] = None) -> Token:
+        """
+        Выпускает токен доступа и, если refresh_token не передан, новый токен обновления.
+
+        Параметры:
+            - email (str): Email пользователя (subject токенов).
+            - refresh_token (str, optional): Действующий токен обновления, который нужно вернуть без замены.
+
+        Возвращает:
+            Token: Токен доступа и обновления.
+        """
+        access_token = UserService.create_access_token(data={"sub": email}, expires_delta=timedelta(
+            minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+        if refresh_token is None:
+            refresh_token = UserService.create_refresh_token(data={"sub": email}, expires_delta=timedelta(
+                minutes=REFRESH_TOKEN_EXPIRE_MINUTES))
+        return Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer"
+        )
+
+    @staticmethod
+    async def refresh_tokens(refresh_token: str, rotate: Optional[bool] = None) -> Optional[Token]:
+        """
+        Выпускает новый токен доступа по токену обновления без проверки пароля.
+
+        Пользователь проверяется через кэш get_current_user, поэтому обновление обычно не обращается к БД.
+        При ротации прежний токен обновления отзывается атомарно (revoke_once), поэтому один токен можно
+        обменять только один раз, даже при одновременных запросах в разные воркеры.
+
+        Параметры:
+            - refresh_token (str): Токен обновления.
+            - rotate (bool, optional): Выпустить и новый токен обновления. По умолчанию - значение
+              REFRESH_TOKEN_ROTATION на момент вызова.
+
+        Возвращает:
+            Optional[Token]: Новые токены или None, если токен недействителен, отозван, не является токеном
+            обновления или пользователь не найден.
+        """
+        if rotate is None:
+            rotate = REFRESH_TOKEN_ROTATION
+        try:
+            payload = decode_token(refresh_token, TOKEN_TYPE_REFRESH)
+        except JWTError:
+            return None
+        if rotate:
+            # Отзыв и есть проверка: повторное или одновременное использование токена не проходит
+            if await get_principal(payload["sub"]) is None or not await revocation_list.revoke_once(payload):
+                return None
+        elif await revocation_list.is_revoked(payload) or await get_principal(payload["sub"]) is None:
+            return None
+        return UserService.issue_tokens(payload["sub"], refresh_token=None if rotate else refresh_token)
+
+    @staticmethod
+    async def logout(access_claims: dict, refresh_token: Optional[str] = None) -> None:
+        """
+        Отзывает токен доступа и, если передан, токен обновления того же пользователя.
+
+        Параметры:
+            - access_claims (dict): Claims проверенного токена доступа.
+            - refresh_token (str, optional): Токен обновления. Недействительный или чужой токен не отзывается.
+        """
+        tokens = [access_claims]
+        if refresh_token:
+            try:
+                refresh_claims = decode_token(refresh_token, TOKEN_TYPE_REFRESH)
+            except JWTError:
+                refresh_claims = None
+            if refresh_claims is not None and refresh_claims["sub"] == access_claims["sub"]:
+                tokens.append(refresh_claims)
+        await revocation_list.revoke(*tokens)
+
+    @staticmethod
+    async def get_users_page(limit: int = 100, after_id: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Получает страницу пользователей с пагинацией по ключу (id).
+
+        Выбираются только поля UserRetrieveSchema, хэш пароля не загружается.
+
+        Параметры:
+            - limit (int, optional): Максимальное количество пользователей.
+            - after_id (int, optional): id последнего пользователя предыдущей страницы.
+
+        Возвращает:
+            Tuple[List[dict], Optional[int]]: Пользователи и id, после которого начинается следующая страница,
+            или None, если страница последняя.
+        """
+        query = User.all()
+        if after_id is not None:
+            query = query.filter(id__gt=after_id)
+        users = await query.order_by('id').limit(limit + 1).values(*USER_LIST_FIELDS)
+        if len(users) > limit:
+            users = users[:limit]
+            return users, users[-1]['id']
+        return users, None
+
+    @staticmethod
+    async def iter_users(batch_size: int = USER_STREAM_BATCH_SIZE) -> AsyncIterator[List]:
+        """
+        Читает всех пользователей пачками из серверного курсора, упорядоченными по id.
+
+        Выбираются только поля UserRetrieveSchema, хэш пароля не загружается.
+
+        Параметры:
+            batch_size (int, optional): Количество строк в пачке.
+
+        Возвращает:
+            AsyncIterator[List]: Пачки строк.
+        """
+        columns = ', '.join(f'"{field}"' for field in USER_LIST_FIELDS)
+        query = f'SELECT {columns} FROM "{User._meta.db_table}" ORDER BY "id"'
+        async for batch in iter_query_batches(User._meta.db, query, batch_size=batch_size):
+            yield batch
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
         """
@@ -113,8 +219,8 @@ class UserService:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        to_encode.update({"exp": expire, "type": TOKEN_TYPE_ACCESS, "jti": uuid.uuid4().hex})
+        encoded_jwt = token_codec.encode(to_encode)
         return encoded_jwt
 
     @staticmethod
@@ -134,7 +240,7 @@ class UserService:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        to_encode.update({"exp": expire, "type": TOKEN_TYPE_REFRESH, "jti": uuid.uuid4().hex})
+        encoded_jwt = token_codec.encode(to_encode)
         return encoded_jwt
 
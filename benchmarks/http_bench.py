@@ -0,0 +1,266 @@
+"""
+HTTP-бенчмарк горячих эндпоинтов: регистрация, логин, список, получение, создание и изменение продуктов.
+
+По умолчанию приложение запускается в том же процессе через httpx.AsyncClient (как в tests/conftest.py),
+с выполнением его startup/shutdown: подключение к БД из .env (POSTGRES_*), прогрев пула.
+С --url запросы отправляются на запущенный сервер (например, uvicorn или python -m bb.server).
+
+Для каждого сценария и каждого уровня конкурентности выводятся пропускная способность и
+перцентили задержки p50/p95/p99; результаты записываются в JSON. С --compare выводится разница
+с результатами предыдущего запуска. Созданные бенчмарком пользователи и продукты удаляются в конце.
+
+Все запросы идут с одного IP, поэтому для измерения register/login без ограничения частоты отключите
+контроль допуска: AUTH_IP_RATE=0 AUTH_EMAIL_RATE=0 (для сервера - в его окружении).
+
+Запуск:
+    python -m benchmarks.http_bench --concurrency 1 16 64 --requests 500 --output bench.json
+    python -m benchmarks.http_bench --url http://127.0.0.1:8000 --compare bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+PASSWORD = "BenchPassword1!"
+# Сценарии с bcrypt (регистрация и логин) на порядки медленнее остальных
+PASSWORD_SCENARIOS = ("register", "login")
+SCENARIOS = ("register", "login", "list_products", "get_product", "create_product", "update_product")
+# Количество продуктов, которые по очереди читает и изменяет сценарии get_product и update_product
+UPDATE_POOL_SIZE = 100
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchSession:
+    """
+    Данные бенчмарка: уникальные пользователи, токен, продукты для изменения и очистка в конце.
+
+    Атрибуты:
+        - client (httpx.AsyncClient): Клиент приложения.
+        - tag (str): Уникальная метка запуска в email и названиях продуктов.
+    """
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+        self.tag = f"{random.getrandbits(32):08x}"
+        self._phones = itertools.count(random.randrange(10 ** 9, 9 * 10 ** 9, 10 ** 5))
+        self._sequence = itertools.count()
+        self.user_ids: List[int] = []
+        self.email = ""
+        self.headers: Dict[str, str] = {}
+        self.owner_id: Optional[int] = None
+        self.product_ids: List[int] = []
+
+    def new_user(self) -> dict:
+        number = next(self._sequence)
+        return {
+            "name": f"Bench User {number}",
+            "email": f"bench-{self.tag}-{number}@example.com",
+            "phone": f"+7{next(self._phones):010d}",
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+        }
+
+    async def register(self) -> httpx.Response:
+        response = await self.client.post("/users/register", json=self.new_user())
+        if response.status_code == 200:
+            self.user_ids.append(response.json()["id"])
+        return response
+
+    async def setup(self) -> None:
+        """
+        Регистрирует основного пользователя, получает токен и создает активные продукты.
+        """
+        user = self.new_user()
+        response = await self.client.post("/users/register", json=user)
+        response.raise_for_status()
+        self.owner_id = response.json()["id"]
+        self.user_ids.append(self.owner_id)
+        self.email = user["email"]
+        response = await self.client.post("/users/login", json={"email": self.email, "password": PASSWORD})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for _ in range(UPDATE_POOL_SIZE):
+            response = await self.create_product()
+            response.raise_for_status()
+            self.product_ids.append(response.json()["id"])
+        response = await self.client.post(
+            "/products/bulk/status", json={"owner_id": self.owner_id, "is_active": True}, headers=self.headers
+        )
+        response.raise_for_status()
+
+    async def login(self) -> httpx.Response:
+        return await self.client.post("/users/login", json={"email": self.email, "password": PASSWORD})
+
+    async def list_products(self) -> httpx.Response:
+        return await self.client.get("/products", params={"limit": 10}, headers=self.headers)
+
+    async def get_product(self) -> httpx.Response:
+        product_id = self.product_ids[next(self._sequence) % len(self.product_ids)]
+        return await self.client.get(f"/products/{product_id}", headers=self.headers)
+
+    async def create_product(self) -> httpx.Response:
+        return await self.client.post("/products", json={
+            "name": f"Bench Product {self.tag} {next(self._sequence)}",
+            "description": "Benchmark product",
+            "price": "99.90",
+        }, headers=self.headers)
+
+    async def update_product(self) -> httpx.Response:
+        product_id = self.product_ids[next(self._sequence) % len(self.product_ids)]
+        return await self.client.patch(
+            f"/products/{product_id}", json={"price": f"{random.randint(100, 99999) / 100:.2f}"}, headers=self.headers
+        )
+
+    async def cleanup(self) -> None:
+        """
+        Удаляет продукты основного пользователя и всех зарегистрированных пользователей.
+        """
+        if self.headers:
+            await self.client.post("/products/bulk/delete", json={"owner_id": self.owner_id}, headers=self.headers)
+        for user_id in self.user_ids:
+            await self.client.delete(f"/users/{user_id}")
+
+
+async def run_scenario(
+        name: str, call: Callable[[], Awaitable[httpx.Response]], requests: int, concurrency: int) -> dict:
+    """
+    Выполняет requests вызовов call, не более concurrency одновременно, и считает задержки.
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while next(remaining) < requests:
+            started = time.perf_counter()
+            try:
+                response = await call()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def print_result(result: dict, previous: Optional[dict] = None) -> None:
+    line = (
+        f"{result['scenario']:>15} c={result['concurrency']:<4} {result['rps']:>9.1f} req/s  "
+        f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+        f"errors={result['errors']}"
+    )
+    if previous:
+        line += (
+            f"  | rps {(result['rps'] / previous['rps'] - 1) * 100:+.1f}%"
+            f" p99 {(result['p99_ms'] / previous['p99_ms'] - 1) * 100 if previous['p99_ms'] else 0:+.1f}%"
+        )
+    print(line)
+
+
+async def run(args: argparse.Namespace, client: httpx.AsyncClient) -> List[dict]:
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    session = BenchSession(client)
+    results = []
+    try:
+        await session.setup()
+        for name in args.scenarios:
+            requests = args.password_requests if name in PASSWORD_SCENARIOS else args.requests
+            for concurrency in args.concurrency:
+                result = await run_scenario(name, getattr(session, name), requests, concurrency)
+                print_result(result, previous.get((name, concurrency)))
+                results.append(result)
+    finally:
+        await session.cleanup()
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+            results = await run(args, client)
+    else:
+        from bb.main import app
+
+        await app.router.startup()
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://testserver", timeout=args.timeout) as client:
+                results = await run(args, client)
+        finally:
+            await app.router.shutdown()
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "target": args.url or "in-process",
+            "requests": args.requests,
+            "password_requests": args.password_requests,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Throughput and latency of the hot HTTP endpoints.")
+    parser.add_argument("--url", help="Адрес запущенного сервера. По умолчанию приложение запускается в процессе.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="Уровни конкурентности.")
+    parser.add_argument("--requests", type=int, default=500, help="Запросов на сценарий и уровень конкурентности.")
+    parser.add_argument(
+        "--password-requests", type=int, default=50, help="Запросов для сценариев с bcrypt (register, login).",
+    )
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), help="Сценарии.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут одного запроса, с.")
+    parser.add_argument("--output", default="http_bench.json", help="Файл для результатов в JSON.")
+    parser.add_argument("--compare", help="JSON предыдущего запуска для сравнения.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Бенчмарк задержки цикла событий при одновременных логинах.
+
+Сравнивает вызов bcrypt прямо в корутине (как раньше) с выполнением через PasswordHasher.
+Пока идут "логины", фоновая задача каждые несколько миллисекунд засыпает и измеряет,
+насколько позже заданного она проснулась, - это и есть задержка цикла событий.
+
+Запуск:
+    python -m benchmarks.password_hashing --logins 32 --rounds 12 --workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+from bb.security.passwords import PasswordHasher
+
+PASSWORD = "Password123!"
+TICK_INTERVAL = 0.005
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list) -> None:
+    """
+    Измеряет запаздывание пробуждений относительно TICK_INTERVAL до установки stop.
+    """
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(time.perf_counter() - started - TICK_INTERVAL)
+
+
+async def run_scenario(name: str, login, logins: int) -> dict:
+    """
+    Запускает logins одновременных проверок пароля и собирает задержки цикла событий.
+    """
+    stop = asyncio.Event()
+    lags: list = []
+    ticker = asyncio.create_task(measure_loop_lag(stop, lags))
+    await asyncio.sleep(TICK_INTERVAL * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "scenario": name,
+        "logins": logins,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(logins / elapsed, 1),
+        "lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "lag_p99_ms": round(lags_ms[int(len(lags_ms) * 0.99) - 1 if len(lags_ms) > 1 else 0], 2),
+        "lag_max_ms": round(lags_ms[-1], 2),
+    }
+
+
+async def main(logins: int, rounds: int, workers: int, executor: str) -> None:
+    hashed = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    hasher = PasswordHasher(executor_type=executor, workers=workers, rounds=rounds)
+
+    async def inline_login():
+        # Прежнее поведение: bcrypt.checkpw прямо в обработчике.
+        return bcrypt.checkpw(PASSWORD.encode('utf-8'), hashed.encode('utf-8'))
+
+    async def pooled_login():
+        return await hasher.verify(PASSWORD, hashed)
+
+    # Прогрев пула, чтобы не учитывать запуск потоков/процессов.
+    await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(workers)))
+
+    for result in (
+        await run_scenario("inline", inline_login, logins),
+        await run_scenario(f"{executor}-pool", pooled_login, logins),
+    ):
+        print(
+            f"{result['scenario']:>14}: {result['logins']} logins in {result['elapsed_s']}s "
+            f"({result['logins_per_s']}/s), loop lag p50={result['lag_p50_ms']}ms "
+            f"p99={result['lag_p99_ms']}ms max={result['lag_max_ms']}ms"
+        )
+    print(f"hasher stats: {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Event loop lag under concurrent bcrypt logins.")
+    parser.add_argument("--logins", type=int, default=32, help="Количество одновременных логинов.")
+    parser.add_argument("--rounds", type=int, default=12, help="Стоимость bcrypt.")
+    parser.add_argument("--workers", type=int, default=4, help="Размер пула хэширования.")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread", help="Тип пула.")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds, args.workers, args.executor))
@@ -0,0 +1,238 @@
+"""
+Детерминированное заполнение БД большими объемами данных для нагрузочного тестирования.
+
+Пользователи, продукты, корзины и их содержимое генерируются из random.Random(seed) и записываются
+операциями COPY в одной транзакции, без HTTP API и без bcrypt на каждого пользователя: у всех
+пользователей один заранее вычисленный хэш пароля --password. Одинаковые аргументы дают одинаковые
+данные; с --truncate совпадают и ID.
+
+ID назначаются явно, начиная со следующего после максимального в таблице, после записи счетчики
+последовательностей сдвигаются. Поэтому во время заполнения в эти таблицы не должен писать никто другой.
+Схема БД должна быть создана заранее (aerich upgrade). Подключение - из .env (POSTGRES_*).
+
+Запуск:
+    python -m benchmarks.seed --users 100000 --products 1000000 --cart-ratio 0.3 --seed 42 --truncate
+"""
+import argparse
+import asyncio
+import random
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Tuple
+
+import bcrypt
+from tortoise import Tortoise
+
+from bb.core.config import DATABASE_CONNECTION, MODELS, PASSWORD_HASH_ROUNDS
+
+# Все даты отсчитываются от фиксированного момента, чтобы данные не зависели от времени запуска
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HISTORY_SECONDS = 365 * 24 * 3600
+
+ADJECTIVES = (
+    "красный", "синий", "большой", "компактный", "легкий", "прочный", "новый", "классический", "умный",
+    "беспроводной", "кожаный", "деревянный", "стальной", "детский", "спортивный", "домашний",
+)
+NOUNS = (
+    "чайник", "телефон", "рюкзак", "стол", "кресло", "фонарь", "зонт", "ноутбук", "чемодан", "лампа",
+    "наушники", "кроссовки", "куртка", "часы", "мяч", "велосипед", "пылесос", "холодильник",
+)
+DESCRIPTION_WORDS = (
+    "качество", "гарантия", "доставка", "подарок", "скидка", "материал", "размер", "цвет", "модель",
+    "удобный", "надежный", "быстрый", "тихий", "экономичный", "универсальный", "оригинальный",
+)
+
+
+def chunked(records: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def random_time(rng: random.Random) -> datetime:
+    return BASE_TIME + timedelta(seconds=rng.randrange(HISTORY_SECONDS))
+
+
+class Seeder:
+    """
+    Генератор данных и запись через COPY.
+
+    Атрибуты:
+        - rng (random.Random): Источник случайности; порядок вызовов фиксирован, поэтому данные детерминированы.
+        - batch_size (int): Количество строк в одной операции COPY.
+    """
+
+    def __init__(self, connection, seed: int, batch_size: int) -> None:
+        self.connection = connection
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+
+    async def next_id(self, table: str) -> int:
+        return await self.connection.fetchval(f'SELECT COALESCE(MAX("id"), 0) + 1 FROM "{table}"')
+
+    async def copy(self, table: str, columns: List[str], records: Iterable[tuple]) -> int:
+        """
+        Записывает строки пачками по batch_size и возвращает их количество.
+        """
+        total = 0
+        for chunk in chunked(records, self.batch_size):
+            await self.connection.copy_records_to_table(table, records=chunk, columns=columns)
+            total += len(chunk)
+        return total
+
+    async def reset_sequence(self, table: str) -> None:
+        await self.connection.execute(
+            f"""SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), COALESCE(MAX("id"), 1)) FROM "{table}" """
+        )
+
+    def users(self, first_id: int, count: int, password_hash: str) -> Iterator[tuple]:
+        for user_id in range(first_id, first_id + count):
+            created_at = random_time(self.rng)
+            yield (
+                user_id, f"Seed User {user_id}", f"user{user_id}@seed.example.com", f"+7{9_000_000_000 + user_id}",
+                password_hash, created_at, created_at,
+            )
+
+    def products(
+            self, first_id: int, count: int, first_user_id: int, users: int, active_ratio: float,
+            active_ids: array, active_prices: array) -> Iterator[tuple]:
+        rng = self.rng
+        for product_id in range(first_id, first_id + count):
+            cents = rng.randint(100, 1_000_000)
+            is_active = rng.random() < active_ratio
+            if is_active:
+                active_ids.append(product_id)
+                active_prices.append(cents)
+            created_at = random_time(rng)
+            yield (
+                product_id,
+                f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(NOUNS)} {product_id}",
+                ' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(5, 20))),
+                Decimal(cents).scaleb(-2),
+                is_active,
+                created_at,
+                created_at,
+                first_user_id + rng.randrange(users),
+            )
+
+    def carts(
+            self, first_id: int, first_user_id: int, users: int, cart_ratio: float, max_items: int,
+            active_ids: array, active_prices: array) -> Iterator[Tuple[tuple, List[tuple]]]:
+        """
+        Генерирует корзины с уже посчитанными cached_total и items_count вместе с их строками связи с продуктами.
+        """
+        rng = self.rng
+        cart_id = first_id
+        for user_id in range(first_user_id, first_user_id + users):
+            if rng.random() >= cart_ratio:
+                continue
+            positions = rng.sample(range(len(active_ids)), min(rng.randint(1, max_items), len(active_ids)))
+            total = sum(active_prices[position] for position in positions)
+            yield (
+                (cart_id, user_id, Decimal(total).scaleb(-2), len(positions)),
+                [(cart_id, active_ids[position]) for position in positions],
+            )
+            cart_id += 1
+
+    async def copy_carts(
+            self, cart_table: str, items_table: str, carts: Iterable[Tuple[tuple, List[tuple]]]) -> Tuple[int, int]:
+        """
+        Записывает корзины и их содержимое пачками: содержимое пачки пишется сразу после ее корзин.
+
+        Возвращает:
+            Tuple[int, int]: Количество корзин и строк содержимого.
+        """
+        total_carts = total_items = 0
+        for chunk in chunked(carts, self.batch_size):
+            items = [item for _, cart_items in chunk for item in cart_items]
+            await self.connection.copy_records_to_table(
+                cart_table, records=[cart for cart, _ in chunk],
+                columns=["id", "user_id", "cached_total", "items_count"],
+            )
+            await self.connection.copy_records_to_table(
+                items_table, records=items, columns=["shoppingcart_id", "product_id"]
+            )
+            total_carts += len(chunk)
+            total_items += len(items)
+        return total_carts, total_items
+
+
+async def seed(args: argparse.Namespace) -> None:
+    await Tortoise.init(config={
+        "connections": {"default": DATABASE_CONNECTION},
+        "apps": {"models": {"models": [*MODELS], "default_connection": "default"}},
+    })
+    from bb.cart.models import ShoppingCart
+    from bb.products.models import Product
+    from bb.users.models import User
+
+    user_table, product_table, cart_table = User._meta.db_table, Product._meta.db_table, ShoppingCart._meta.db_table
+    cart_items_table = ShoppingCart._meta.fields_map["products"].through
+
+    password_hash = bcrypt.hashpw(args.password.encode('utf-8'), bcrypt.gensalt(PASSWORD_HASH_ROUNDS)).decode('utf-8')
+    started = time.perf_counter()
+    try:
+        async with Tortoise.get_connection("default").acquire_connection() as connection:
+            async with connection.transaction():
+                if args.truncate:
+                    await connection.execute(
+                        f'TRUNCATE "{user_table}", "{product_table}", "{cart_table}", "{cart_items_table}" '
+                        f'RESTART IDENTITY CASCADE'
+                    )
+                seeder = Seeder(connection, args.seed, args.batch_size)
+
+                first_user_id = await seeder.next_id(user_table)
+                users = await seeder.copy(
+                    user_table, ["id", "name", "email", "phone", "password", "created_at", "updated_at"],
+                    seeder.users(first_user_id, args.users, password_hash),
+                )
+                print(f"users: {users} ({time.perf_counter() - started:.1f}s)")
+
+                active_ids, active_prices = array('q'), array('q')
+                products = await seeder.copy(
+                    product_table,
+                    ["id", "name", "description", "price", "is_active", "created_at", "updated_at", "owner_id"],
+                    seeder.products(
+                        await seeder.next_id(product_table), args.products, first_user_id, args.users,
+                        args.active_ratio, active_ids, active_prices,
+                    ),
+                )
+                print(f"products: {products}, active: {len(active_ids)} ({time.perf_counter() - started:.1f}s)")
+
+                carts, cart_items = await seeder.copy_carts(cart_table, cart_items_table, seeder.carts(
+                    await seeder.next_id(cart_table), first_user_id, args.users,
+                    args.cart_ratio if active_ids else 0, args.cart_items, active_ids, active_prices,
+                ))
+                print(f"carts: {carts}, cart items: {cart_items} ({time.perf_counter() - started:.1f}s)")
+
+                for table in (user_table, product_table, cart_table):
+                    await seeder.reset_sequence(table)
+            for table in (user_table, product_table, cart_table, cart_items_table):
+                await connection.execute(f'ANALYZE "{table}"')
+    finally:
+        await Tortoise.close_connections()
+    print(f"done in {time.perf_counter() - started:.1f}s, password for all users: {args.password}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Deterministic bulk data seeder (COPY).")
+    parser.add_argument("--users", type=int, default=10_000, help="Количество пользователей.")
+    parser.add_argument("--products", type=int, default=100_000, help="Количество продуктов.")
+    parser.add_argument("--active-ratio", type=float, default=0.8, help="Доля активных продуктов.")
+    parser.add_argument("--cart-ratio", type=float, default=0.3, help="Доля пользователей с корзиной.")
+    parser.add_argument("--cart-items", type=int, default=10, help="Максимум товаров в одной корзине.")
+    parser.add_argument("--seed", type=int, default=42, help="Начальное значение генератора.")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Строк в одной операции COPY.")
+    parser.add_argument("--password", default="Password123!", help="Пароль всех пользователей.")
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы перед заполнением.")
+    args = parser.parse_args()
+    if args.products and args.users < 1:
+        parser.error("products need at least one user as owner")
+    asyncio.run(seed(args))
@@ -0,0 +1,79 @@
+"""
+Микробенчмарк стоимости сериализации одной строки списка продуктов.
+
+"before" - прежний путь: объект модели Tortoise, валидация через ProductRetrieveSchema (response_model),
+jsonable_encoder и стандартный JSONResponse. "after" - словари из .values() и ORJSONResponse напрямую.
+Выборка из БД не измеряется: строки строятся в памяти, поэтому бенчмарк не требует PostgreSQL.
+
+Запуск:
+    python -m benchmarks.serialization --rows 1000 10000
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from tortoise import Tortoise
+
+from bb.core.config import MODELS
+from bb.core.responses import ORJSONResponse
+from bb.products.schemas import ProductRetrieveSchema, PRODUCT_LIST_FIELDS
+
+Tortoise.init_models(MODELS, 'models')
+
+from bb.products.models import Product  # noqa: E402  модели доступны после init_models
+
+
+def make_rows(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            'id': i, 'name': f'Product {i}', 'description': 'Description ' * 8, 'price': Decimal('199.90'),
+            'is_active': True, 'created_at': now, 'updated_at': now, 'owner_id': 1,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def before(rows: List[dict]) -> bytes:
+    products = [Product(**row) for row in rows]
+    adapter = TypeAdapter(List[ProductRetrieveSchema])
+    validated = adapter.validate_python(products, from_attributes=True)
+    return JSONResponse({"items": jsonable_encoder(validated), "next_cursor": None}).body
+
+
+def after(rows: List[dict]) -> bytes:
+    projected = [{field: row[field] for field in PRODUCT_LIST_FIELDS} for row in rows]
+    return ORJSONResponse({"items": projected, "next_cursor": None}).body
+
+
+def measure(func, rows: List[dict], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(sizes: List[int], repeat: int) -> None:
+    for size in sizes:
+        rows = make_rows(size)
+        results = {name: measure(func, rows, repeat) for name, func in (("before", before), ("after", after))}
+        print(
+            f"{size:>6} rows: before {results['before'] * 1e6 / size:.2f} us/row, "
+            f"after {results['after'] * 1e6 / size:.2f} us/row "
+            f"(x{results['before'] / results['after']:.1f})"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Per-row serialization cost of list endpoints.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Размеры ответа.")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество повторов, берется лучший.")
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
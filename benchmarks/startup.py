@@ -0,0 +1,84 @@
+"""
+Бенчмарк холодного старта: время импорта приложения и время до первого ответа воркера.
+
+"import" - импорт bb.main в чистом интерпретаторе. "first request" - от запуска процесса uvicorn
+до первого успешного ответа GET /system/stats (включает импорт, подключение к БД, прогрев пула
+и, в режиме generate_schemas, создание схемы). Каждое измерение повторяется в новом процессе,
+в отчет выводятся медиана и максимум. Для режима first request нужна доступная PostgreSQL из .env.
+
+Запуск:
+    python -m benchmarks.startup --runs 5 --port 8099
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import bb.main; print(time.perf_counter() - t)"
+POLL_INTERVAL = 0.01
+
+
+def measure_import() -> float:
+    """
+    Импортирует bb.main в новом интерпретаторе и возвращает время импорта в секундах.
+    """
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_first_request(port: int, generate_schemas: bool, timeout: float) -> float:
+    """
+    Запускает uvicorn и возвращает время в секундах до первого ответа 200.
+    """
+    env = dict(os.environ, DB_GENERATE_SCHEMAS="true" if generate_schemas else "false")
+    url = f"http://127.0.0.1:{port}/system/stats"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bb.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if client.get(url).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(POLL_INTERVAL)
+        raise TimeoutError(f"No response from {url} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def report(name: str, samples: list) -> None:
+    print(
+        f"{name:>30}: median={statistics.median(samples) * 1000:.0f}ms "
+        f"max={max(samples) * 1000:.0f}ms runs={len(samples)}"
+    )
+
+
+def main(runs: int, port: int, timeout: float, skip_server: bool) -> None:
+    report("import bb.main", [measure_import() for _ in range(runs)])
+    if skip_server:
+        return
+    for generate_schemas in (True, False):
+        samples = [measure_first_request(port, generate_schemas, timeout) for _ in range(runs)]
+        report(f"first request (schemas={'on' if generate_schemas else 'off'})", samples)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cold start: import time and time to first request.")
+    parser.add_argument("--runs", type=int, default=5, help="Количество запусков на каждый режим.")
+    parser.add_argument("--port", type=int, default=8099, help="Порт для uvicorn.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Предельное время ожидания старта, с.")
+    parser.add_argument("--import-only", action="store_true", help="Измерить только импорт (без PostgreSQL).")
+    args = parser.parse_args()
+    main(args.runs, args.port, args.timeout, args.import_only)
@@ -0,0 +1,92 @@
+"""
+Бенчмарк выпуска и проверки токенов: прежний путь (jwt.encode/jwt.decode с ключом-строкой)
+против TokenCodec (ключ подготовлен заранее) и проверка с кэшем проверенных токенов.
+Отдельно измеряется проверка отзыва по фильтру Блума, заполненному до capacity, - добавка
+к каждому аутентифицированному запросу, если токен не отозван.
+
+Для HS256 используется SECRET_KEY из .env (или тестовое значение), для ES256 и RS256 ключи генерируются.
+PostgreSQL не нужна.
+
+Запуск:
+    python -m benchmarks.tokens --iterations 20000 --algorithms HS256 ES256
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Tuple
+
+from Crypto.PublicKey import ECC, RSA
+from jose import jwt
+
+from bb.core.config import REVOCATION_FILTER_CAPACITY, REVOCATION_FILTER_ERROR_RATE, SECRET_KEY
+from bb.security.revocation import BloomFilter
+from bb.security.tokens import TokenCodec
+
+ALGORITHMS = ("HS256", "ES256", "RS256")
+
+
+def generate_keys(algorithm: str) -> Tuple[str, str]:
+    """
+    Возвращает пару (ключ подписи, ключ проверки) в виде строк, как они приходят из настроек.
+    """
+    if algorithm.startswith("HS"):
+        secret = SECRET_KEY or "benchmark-secret"
+        return secret, secret
+    key = ECC.generate(curve="P-256") if algorithm.startswith("ES") else RSA.generate(2048)
+    private = key.export_key(format="PEM") if algorithm.startswith("ES") else key.export_key().decode()
+    public = key.public_key().export_key(format="PEM")
+    return private, public if isinstance(public, str) else public.decode()
+
+
+def measure(iterations: int, call: Callable[[], object]) -> float:
+    """
+    Возвращает количество вызовов в секунду.
+    """
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return iterations / (time.perf_counter() - started)
+
+
+def bench(algorithm: str, iterations: int) -> None:
+    private, public = generate_keys(algorithm)
+    claims = {"sub": "bench@example.com", "type": "access", "exp": datetime.utcnow() + timedelta(minutes=30)}
+    codec = TokenCodec(algorithm, private, public)
+    cached = TokenCodec(algorithm, private, public, cache_size=1, cache_ttl=300)
+    token = codec.encode(claims)
+    # Асимметричная подпись на порядки медленнее HMAC, поэтому для нее итераций меньше
+    slow_iterations = iterations if algorithm.startswith("HS") else max(1, iterations // 50)
+
+    results = [
+        ("issue, jwt.encode", measure(slow_iterations, lambda: jwt.encode(claims, private, algorithm=algorithm))),
+        ("issue, codec", measure(slow_iterations, lambda: codec.encode(claims))),
+        ("verify, jwt.decode", measure(slow_iterations, lambda: jwt.decode(token, public, algorithms=[algorithm]))),
+        ("verify, codec", measure(slow_iterations, lambda: codec.decode(token))),
+        ("verify, codec cached", measure(iterations, lambda: cached.decode(token))),
+    ]
+    for name, rate in results:
+        print(f"{algorithm:>6} {name:>22}: {rate:>10.0f} ops/s  {1e6 / rate:>9.1f} us/op")
+
+
+def bench_revocation(iterations: int) -> None:
+    bloom = BloomFilter(REVOCATION_FILTER_CAPACITY, REVOCATION_FILTER_ERROR_RATE)
+    for _ in range(REVOCATION_FILTER_CAPACITY):
+        bloom.add(uuid.uuid4().hex)
+    jti = uuid.uuid4().hex
+    rate = measure(iterations, lambda: jti in bloom)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(iterations))
+    print(
+        f"revocation filter ({bloom.count} entries, {bloom.size // 8 // 1024} KiB, {bloom.hashes} hashes): "
+        f"{1e6 / rate:.1f} us/check, false positives {false_positives / iterations:.4%}"
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="JWT issue and verify throughput.")
+    parser.add_argument("--iterations", type=int, default=20_000, help="Итераций для HS256 и проверки из кэша.")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS), help="Алгоритмы.")
+    args = parser.parse_args()
+    for algorithm in args.algorithms:
+        bench(algorithm, args.iterations)
+    bench_revocation(args.iterations)
@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "shoppingcart" ADD COLUMN IF NOT EXISTS "cached_total" DECIMAL(14,2) NOT NULL  DEFAULT 0;
+        ALTER TABLE "shoppingcart" ADD COLUMN IF NOT EXISTS "items_count" INT NOT NULL  DEFAULT 0;
+        UPDATE "shoppingcart" SET "cached_total" = totals."total", "items_count" = totals."count"
+        FROM (
+            SELECT "shoppingcart_product"."shoppingcart_id", SUM("product"."price") AS "total", COUNT(*) AS "count"
+            FROM "shoppingcart_product"
+            JOIN "product" ON "product"."id" = "shoppingcart_product"."product_id"
+            GROUP BY "shoppingcart_product"."shoppingcart_id"
+        ) AS totals
+        WHERE "shoppingcart"."id" = totals."shoppingcart_id";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "shoppingcart" DROP COLUMN IF EXISTS "cached_total";
+        ALTER TABLE "shoppingcart" DROP COLUMN IF EXISTS "items_count";"""
@@ -0,0 +1,32 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DELETE FROM "shoppingcart_product" AS "duplicate" USING "shoppingcart_product" AS "kept"
+        WHERE "duplicate"."ctid" > "kept"."ctid"
+          AND "duplicate"."shoppingcart_id" = "kept"."shoppingcart_id"
+          AND "duplicate"."product_id" = "kept"."product_id";
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'pk_shoppingcart_product') THEN
+                ALTER TABLE "shoppingcart_product"
+                    ADD CONSTRAINT "pk_shoppingcart_product" PRIMARY KEY ("shoppingcart_id", "product_id");
+            END IF;
+        END $$;
+        CREATE INDEX IF NOT EXISTS "idx_shoppingcart_product_product_id" ON "shoppingcart_product" ("product_id");
+        UPDATE "shoppingcart" SET "cached_total" = totals."total", "items_count" = totals."count"
+        FROM (
+            SELECT "shoppingcart"."id", COALESCE(SUM("product"."price"), 0) AS "total", COUNT("product"."id") AS "count"
+            FROM "shoppingcart"
+            LEFT JOIN "shoppingcart_product" ON "shoppingcart_product"."shoppingcart_id" = "shoppingcart"."id"
+            LEFT JOIN "product" ON "product"."id" = "shoppingcart_product"."product_id"
+            GROUP BY "shoppingcart"."id"
+        ) AS totals
+        WHERE "shoppingcart"."id" = totals."id";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_shoppingcart_product_product_id";
+        ALTER TABLE "shoppingcart_product" DROP CONSTRAINT IF EXISTS "pk_shoppingcart_product";"""
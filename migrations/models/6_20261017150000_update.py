@@ -0,0 +1,16 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "product" ADD COLUMN IF NOT EXISTS "search_vector" TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce("name", '')), 'A')
+            || setweight(to_tsvector('russian', coalesce("description", '')), 'B')
+        ) STORED;
+        CREATE INDEX IF NOT EXISTS "idx_product_search_vector" ON "product" USING GIN ("search_vector");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_product_search_vector";
+        ALTER TABLE "product" DROP COLUMN IF EXISTS "search_vector";"""
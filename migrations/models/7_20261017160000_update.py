@@ -0,0 +1,19 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "revokedtoken" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "jti" VARCHAR(64) NOT NULL UNIQUE,
+    "expires_at" TIMESTAMPTZ NOT NULL,
+    "revoked_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_revokedtoke_expires_8751bc" ON "revokedtoken" ("expires_at");
+CREATE INDEX IF NOT EXISTS "idx_revokedtoke_revoked_d696b0" ON "revokedtoken" ("revoked_at");
+COMMENT ON TABLE "revokedtoken" IS 'Модель отозванного токена.';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "revokedtoken";"""
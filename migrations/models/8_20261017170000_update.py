@@ -0,0 +1,31 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TEMPORARY TABLE "kept_shoppingcart" AS
+        SELECT "user_id", MIN("id") AS "id" FROM "shoppingcart" GROUP BY "user_id" HAVING COUNT(*) > 1;
+        INSERT INTO "shoppingcart_product" ("shoppingcart_id", "product_id")
+        SELECT "kept"."id", "shoppingcart_product"."product_id"
+        FROM "shoppingcart_product"
+        JOIN "shoppingcart" ON "shoppingcart"."id" = "shoppingcart_product"."shoppingcart_id"
+        JOIN "kept_shoppingcart" AS "kept" ON "kept"."user_id" = "shoppingcart"."user_id"
+        ON CONFLICT DO NOTHING;
+        DELETE FROM "shoppingcart" USING "kept_shoppingcart" AS "kept"
+        WHERE "shoppingcart"."user_id" = "kept"."user_id" AND "shoppingcart"."id" <> "kept"."id";
+        UPDATE "shoppingcart" SET "cached_total" = totals."total", "items_count" = totals."count"
+        FROM (
+            SELECT "kept"."id", COALESCE(SUM("product"."price"), 0) AS "total", COUNT("product"."id") AS "count"
+            FROM "kept_shoppingcart" AS "kept"
+            LEFT JOIN "shoppingcart_product" ON "shoppingcart_product"."shoppingcart_id" = "kept"."id"
+            LEFT JOIN "product" ON "product"."id" = "shoppingcart_product"."product_id"
+            GROUP BY "kept"."id"
+        ) AS totals
+        WHERE "shoppingcart"."id" = totals."id";
+        DROP TABLE "kept_shoppingcart";
+        CREATE UNIQUE INDEX IF NOT EXISTS "uid_shoppingcart_user_id" ON "shoppingcart" ("user_id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "uid_shoppingcart_user_id";"""
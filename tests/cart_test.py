@@ -0,0 +1,165 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+from bb.main import app
+from bb.cart.models import ShoppingCart
+from bb.cart.services import CartService
+from bb.products.models import Product
+from bb.users.models import User
+
+
+async def create_active_products(count):
+    owner = await User.get(email="testproduct@example.com")
+    await Product.bulk_create([
+        Product(name=f"Cart Product {i}", description="Cart", price=10 + i, is_active=True, owner=owner)
+        for i in range(count)
+    ])
+    return await Product.filter(owner=owner).order_by('id').values_list('id', flat=True)
+
+
+# Добавление нескольких товаров в корзину
+@pytest.mark.asyncio
+async def test_add_products_to_cart(test_db, authenticated_user_token, monkeypatch):
+    async with authenticated_user_token as headers:
+        product_ids = await create_active_products(3)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.post("/cart/products", json={"product_ids": product_ids[:2]}, headers=headers)
+            assert response.status_code == 200
+            # Повторное добавление уже лежащего в корзине товара не создает дубликат
+            response = await client.post("/cart/products", json={"product_ids": product_ids}, headers=headers)
+            assert response.status_code == 200
+            cart = response.json()
+            assert [product["id"] for product in cart["products"]] == product_ids
+            assert float(cart["total_price"]) == 33.0
+
+            response = await client.get("/cart", headers=headers)
+            assert response.status_code == 200
+            assert response.json() == cart
+
+            # Итог, посчитанный в БД, совпадает с поддерживаемым инкрементально
+            model = await ShoppingCart.get(id=cart["id"])
+            assert await model.total_price == model.cached_total == Decimal("33.00")
+            monkeypatch.setattr("bb.cart.services.CART_CACHED_TOTALS", False)
+            response = await client.get("/cart/summary", headers=headers)
+            assert response.json()["total_price"] == "33.00"
+            assert response.json()["items_count"] == 3
+            response = await client.get("/cart", headers=headers)
+            assert response.json()["total_price"] == "33.00"
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+
+
+# Добавление несуществующего товара не изменяет корзину
+@pytest.mark.asyncio
+async def test_add_missing_product_to_cart(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        product_ids = await create_active_products(1)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            missing_id = product_ids[0] + 1000
+            response = await client.post(
+                "/cart/products", json={"product_ids": [product_ids[0], missing_id]}, headers=headers
+            )
+            assert response.status_code == 404
+            assert response.json()["detail"]["product_ids"] == [missing_id]
+
+            response = await client.get("/cart", headers=headers)
+            assert response.json()["products"] == []
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+
+
+# Удаление товаров из корзины и очистка корзины
+@pytest.mark.asyncio
+async def test_remove_products_and_clear_cart(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        product_ids = await create_active_products(4)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            await client.post("/cart/products", json={"product_ids": product_ids}, headers=headers)
+            response = await client.delete(
+                "/cart/products", params={"product_ids": product_ids[:2]}, headers=headers
+            )
+            assert response.status_code == 200
+            assert [product["id"] for product in response.json()["products"]] == product_ids[2:]
+
+            response = await client.delete("/cart", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["products"] == []
+            assert float(response.json()["total_price"]) == 0
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+
+
+# Итоги корзины пересчитываются при изменении цены и удалении товара
+@pytest.mark.asyncio
+async def test_cart_totals_follow_product_changes(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        product_ids = await create_active_products(2)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            await client.post("/cart/products", json={"product_ids": product_ids}, headers=headers)
+            response = await client.get("/cart/summary", headers=headers)
+            assert response.status_code == 200
+            assert float(response.json()["total_price"]) == 21.0
+            assert response.json()["items_count"] == 2
+
+            await client.patch(f"/products/{product_ids[0]}", json={"price": 15.5}, headers=headers)
+            response = await client.get("/cart/summary", headers=headers)
+            assert float(response.json()["total_price"]) == 26.5
+
+            await client.delete(f"/products/{product_ids[1]}", headers=headers)
+            response = await client.get("/cart/summary", headers=headers)
+            assert float(response.json()["total_price"]) == 15.5
+            assert response.json()["items_count"] == 1
+
+            cart = await ShoppingCart.get(id=response.json()["id"])
+            assert await cart.total_price == cart.cached_total
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+
+
+# Одновременное добавление одного товара, в том числе первые запросы без корзины, не создает дубликатов
+@pytest.mark.asyncio
+async def test_concurrent_add_is_idempotent(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        product_ids = await create_active_products(2)
+        owner = await User.get(email="testproduct@example.com")
+        await asyncio.gather(*(CartService.add_products(owner.id, product_ids) for _ in range(5)))
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.get("/cart/summary", headers=headers)
+            assert response.json()["items_count"] == 2
+            assert float(response.json()["total_price"]) == 21.0
+        assert await ShoppingCart.filter(user_id=owner.id).count() == 1
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+
+
+# Удаление пользователя вычитает его товары из корзин других пользователей
+@pytest.mark.asyncio
+async def test_cart_totals_follow_owner_deletion(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        product_ids = await create_active_products(1)
+        seller = await User.create(name="Seller", email="seller@example.com", phone="+70000000002", password="x")
+        foreign = await Product.create(name="Seller Product", description="Cart", price=5, is_active=True, owner=seller)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            await client.post("/cart/products", json={"product_ids": [*product_ids, foreign.id]}, headers=headers)
+            response = await client.get("/cart/summary", headers=headers)
+            assert float(response.json()["total_price"]) == 15.0
+
+            response = await client.delete(f"/users/{seller.id}", headers=headers)
+            assert response.status_code == 200
+            response = await client.get("/cart/summary", headers=headers)
+            assert float(response.json()["total_price"]) == 10.0
+            assert response.json()["items_count"] == 1
+
+            cart = await ShoppingCart.get(id=response.json()["id"])
+            assert await cart.total_price == cart.cached_total
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+        await User.filter(email="seller@example.com").delete()
@@ -1,12 +1,25 @@
 import pytest
 from httpx import AsyncClient
 from tortoise import Tortoise
-from bb.core.config import MODELS, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT
+from bb.core.config import DATABASE_CONNECTION, MODELS
+from bb.core.database import apply_schema_extras
 from bb.main import app
+from bb.products.services import product_cache
+from bb.security.admission import auth_admission
+from bb.security.auth import principal_cache
+from bb.security.revocation import revocation_list
 from bb.users.models import User
 from async_generator import asynccontextmanager
 
-TEST_DB_URL = f'postgres://postgres:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/db_test_bb'
+TEST_DB_CONFIG = {
+    'connections': {
+        'default': {
+            **DATABASE_CONNECTION,
+            'credentials': {**DATABASE_CONNECTION['credentials'], 'user': 'postgres', 'database': 'db_test_bb'},
+        },
+    },
+    'apps': {'models': {'models': [*MODELS], 'default_connection': 'default'}},
+}
 
 
 @pytest.fixture
@@ -20,8 +33,15 @@ def event_loop():
 @pytest.fixture
 def test_db(event_loop):
     async def init():
-        await Tortoise.init(db_url=TEST_DB_URL, modules={'models': [*MODELS]})
+        await Tortoise.init(config=TEST_DB_CONFIG)
         await Tortoise.generate_schemas()
+        await apply_schema_extras()
+        # Тесты удаляют пользователей напрямую через ORM, минуя инвалидацию кэша
+        principal_cache.clear()
+        product_cache.clear()
+        # Все тесты приходят с одного IP: корзины контроля допуска не должны переноситься между тестами
+        auth_admission.clear()
+        revocation_list.clear()
 
     async def fini():
         await Tortoise.close_connections()
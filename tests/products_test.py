@@ -1,7 +1,16 @@
+import csv
+import asyncio
+import io
+import json
+
 import pytest
 from httpx import AsyncClient
 from bb.main import app
+from bb.cart.models import ShoppingCart
+from bb.products.importers import MAX_RECORD_BYTES
 from bb.products.models import Product
+from bb.products.services import ProductService, product_cache
+from bb.users.models import User
 
 
 # Создание продукта
@@ -28,7 +37,7 @@ async def test_get_all_products(test_db, authenticated_user_token):
         async with AsyncClient(app=app, base_url="http://testserver") as client:
             response = await client.get("/products", headers=headers)
             assert response.status_code == 200
-            assert isinstance(response.json(), list)
+            assert isinstance(response.json()["items"], list)
         # Очистка данных в конце теста
         await Product.all().delete()
 
@@ -98,10 +107,320 @@ async def test_get_only_active_productss(test_db, authenticated_user_token):
 
             # Получаем список продуктов
             response = await client.get("/products", headers=headers)
-            products = response.json()
+            products = response.json()["items"]
             assert response.status_code == 200
             assert len(products) <= 5  # Убедитесь, что количество продуктов соответствует ожидаемому
             assert all(product['is_active'] for product in products)
 
             # Очистка данных в конце теста
             await Product.all().delete()
+
+
+# Постраничный обход активных продуктов по курсору
+@pytest.mark.asyncio
+async def test_list_products_cursor_pagination(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        owner = await User.get(email="testproduct@example.com")
+        await Product.bulk_create([
+            Product(name=f"Paged Product {i}", description="Paged", price=10, is_active=i % 3 != 0, owner=owner)
+            for i in range(12)
+        ])
+        expected_ids = await Product.filter(is_active=True).order_by('id').values_list('id', flat=True)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            seen_ids = []
+            params = {"limit": 3}
+            while True:
+                response = await client.get("/products", params=params, headers=headers)
+                assert response.status_code == 200
+                page = response.json()
+                seen_ids += [product["id"] for product in page["items"]]
+                # Цена сериализуется строкой, как в ответах с response_model
+                assert all(product["price"] == "10.00" for product in page["items"])
+                if page["next_cursor"] is None:
+                    break
+                params["after"] = page["next_cursor"]
+            assert seen_ids == expected_ids
+
+            response = await client.get("/products", params={"after": "not-a-cursor"}, headers=headers)
+            assert response.status_code == 400
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Массовый импорт продуктов из NDJSON: ошибочные строки не прерывают импорт
+@pytest.mark.asyncio
+async def test_import_products_ndjson(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        body = "\n".join([
+            '{"name": "Imported 1", "description": "First", "price": 10.5}',
+            '{"name": "Imported 2", "price": 20}',
+            '{"name": "Broken", "price": -1}',
+            'not json',
+            '',
+            '{"name": "Imported 3", "description": "Third", "price": "30.00"}',
+        ])
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.post(
+                "/products/import", content=body.encode(),
+                headers={**headers, "Content-Type": "application/x-ndjson"},
+            )
+            assert response.status_code == 200
+            result = response.json()
+            assert result["created"] == 3
+            assert result["failed"] == 2
+            assert [error["line"] for error in result["errors"]] == [3, 4]
+        names = await Product.all().order_by('id').values_list('name', flat=True)
+        assert names == ["Imported 1", "Imported 2", "Imported 3"]
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Отклоненная БД пачка импорта записывается по строкам, ошибка формата возвращает частичный результат
+@pytest.mark.asyncio
+async def test_import_products_partial_failures(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        body = "\n".join([
+            '{"name": "Imported 1", "price": 10}',
+            '{"name": "Null \\u0000 byte", "price": 20}',
+            '{"name": "Too expensive", "price": "100000000"}',
+            '{"name": "Too precise", "price": "1.005"}',
+            '{"name": "Imported 2", "price": "99999999.99"}',
+            "x" * (MAX_RECORD_BYTES + 1),
+        ])
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.post(
+                "/products/import", content=body.encode(),
+                headers={**headers, "Content-Type": "application/x-ndjson"},
+            )
+            assert response.status_code == 200
+            result = response.json()
+            assert result["created"] == 2
+            assert result["failed"] == 3
+            assert [error["line"] for error in result["errors"]] == [3, 4, 2]
+            assert result["errors"][2]["errors"][0].startswith("Database error")
+            assert result["format_error"] == f"Line 6 exceeds {MAX_RECORD_BYTES} bytes"
+        names = await Product.all().order_by('id').values_list('name', flat=True)
+        assert names == ["Imported 1", "Imported 2"]
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Массовый импорт продуктов из CSV с полями в кавычках
+@pytest.mark.asyncio
+async def test_import_products_csv(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        body = 'name,description,price\r\n"Chair, oak","Solid\nwood",99.90\r\nTable,,150\r\nLamp,Bright\r\n'
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.post(
+                "/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"},
+            )
+            assert response.status_code == 200
+            result = response.json()
+            assert result["created"] == 2
+            assert result["errors"][0]["line"] == 5
+        product = await Product.get(name="Chair, oak")
+        assert product.description == "Solid\nwood"
+        assert str(product.price) == "99.90"
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Потоковая выгрузка каталога в NDJSON и CSV
+@pytest.mark.asyncio
+async def test_export_products(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        owner = await User.get(email="testproduct@example.com")
+        await Product.bulk_create([
+            Product(name=f"Export Product {i}", description="Export", price=5, is_active=i % 2 == 0, owner=owner)
+            for i in range(6)
+        ])
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.get("/products/export", headers=headers)
+            assert response.status_code == 200
+            ndjson_rows = [json.loads(line) for line in response.text.splitlines()]
+            assert [row["name"] for row in ndjson_rows] == ["Export Product 0", "Export Product 2", "Export Product 4"]
+            assert ndjson_rows[0]["price"] == "5.00"
+
+            response = await client.get(
+                "/products/export", params={"format": "csv", "owner_id": owner.id}, headers=headers
+            )
+            assert response.status_code == 200
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            assert len(rows) == 6
+            # NDJSON и CSV выгружают даты в одном формате ISO 8601
+            assert rows[0]["created_at"] == ndjson_rows[0]["created_at"]
+
+            response = await client.get(
+                "/products/export", params={"owner_id": owner.id + 1, "is_active": False}, headers=headers
+            )
+            assert response.status_code == 403
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Полнотекстовый поиск: совпадение в названии выше совпадения в описании, неактивные не находятся
+@pytest.mark.asyncio
+async def test_search_products(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        owner = await User.get(email="testproduct@example.com")
+        await Product.bulk_create([
+            Product(name="Wooden chair", description="Oak", price=10, is_active=True, owner=owner),
+            Product(name="Table", description="Matches any chair", price=20, is_active=True, owner=owner),
+            Product(name="Hidden chair", description="Inactive", price=30, is_active=False, owner=owner),
+            Product(name="Lamp", description="Bright", price=40, is_active=True, owner=owner),
+            Product(name="Chairs set", description="Four chairs", price=50, is_active=True, owner=owner),
+        ])
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.get("/products/search", params={"q": "chair"}, headers=headers)
+            assert response.status_code == 200
+            names = [product["name"] for product in response.json()["items"]]
+            assert set(names) == {"Wooden chair", "Table", "Chairs set"}
+            assert names[-1] == "Table"
+
+            seen, params = [], {"q": "chair", "limit": 1}
+            while True:
+                page = (await client.get("/products/search", params=params, headers=headers)).json()
+                seen += [product["name"] for product in page["items"]]
+                if page["next_cursor"] is None:
+                    break
+                params["after"] = page["next_cursor"]
+            assert seen == names
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Одновременные переключения статуса выполняются атомарно и не теряют изменений
+@pytest.mark.asyncio
+async def test_toggle_product_status_concurrently(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        owner = await User.get(email="testproduct@example.com")
+        product = await Product.create(name="Toggled Product", description="Toggled", price=10, owner=owner)
+
+        results = await asyncio.gather(*(ProductService.toggle_product_status(product.id) for _ in range(21)))
+        assert sorted(result.is_active for result in results) == [False] * 10 + [True] * 11
+        await product.refresh_from_db()
+        assert product.is_active is True
+
+        updated = await ProductService.set_product_active_status(product.id, False)
+        assert updated.is_active is False and updated.owner_id == owner.id
+        assert await ProductService.toggle_product_status(product.id + 1000) is None
+
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.patch(f"/products/{product.id + 1000}", json={"name": "Missing"}, headers=headers)
+            assert response.status_code == 404
+            response = await client.delete(f"/products/{product.id + 1000}", headers=headers)
+            assert response.status_code == 404
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Массовое включение и удаление продуктов затрагивает только продукты текущего пользователя
+@pytest.mark.asyncio
+async def test_bulk_status_and_delete_products(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        owner = await User.get(email="testproduct@example.com")
+        stranger = await User.create(name="Stranger", email="stranger@example.com", phone="+70000000001", password="x")
+        await Product.bulk_create([
+            Product(name=f"Bulk Product {i}", description="Bulk", price=10 + i, owner=owner) for i in range(4)
+        ])
+        own_ids = await Product.filter(owner=owner).order_by('id').values_list('id', flat=True)
+        foreign = await Product.create(name="Foreign Product", description="Foreign", price=5, owner=stranger)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.post(
+                "/products/bulk/status", json={"ids": own_ids[:3] + [foreign.id], "is_active": True}, headers=headers
+            )
+            assert response.status_code == 200
+            assert response.json() == {"affected": 3}
+            assert await Product.filter(is_active=True).count() == 3
+
+            response = await client.post(
+                "/products/bulk/status", json={"owner_id": owner.id, "is_active": True}, headers=headers
+            )
+            assert response.json() == {"affected": 1}
+
+            response = await client.post(
+                "/products/bulk/status", json={"owner_id": stranger.id, "is_active": False}, headers=headers
+            )
+            assert response.status_code == 403
+            response = await client.post("/products/bulk/delete", json={}, headers=headers)
+            assert response.status_code == 422
+
+            # Удаленные продукты вычитаются из итогов корзины
+            cart = await ShoppingCart.create(user=owner)
+            await cart.add_product(own_ids[1:])
+            response = await client.post(
+                "/products/bulk/delete", json={"ids": own_ids[:3] + [foreign.id]}, headers=headers
+            )
+            assert response.json() == {"affected": 3}
+            await cart.refresh_from_db()
+            assert cart.items_count == 1 and cart.cached_total == 13
+            assert await Product.filter(id=foreign.id).exists()
+        # Очистка данных в конце теста
+        await ShoppingCart.all().delete()
+        await Product.all().delete()
+        await stranger.delete()
+
+
+# Получение продукта по ID через кэш: изменения, смена статуса и удаление сразу видны в ответе
+@pytest.mark.asyncio
+async def test_get_product_cached(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        owner = await User.get(email="testproduct@example.com")
+        product = await Product.create(name="Cached Product", description="Cached", price=10, owner=owner)
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 404
+
+            await client.post("/products/bulk/status", json={"ids": [product.id], "is_active": True}, headers=headers)
+            for _ in range(2):
+                response = await client.get(f"/products/{product.id}", headers=headers)
+                assert response.status_code == 200
+                assert response.json() == {
+                    "id": product.id, "name": "Cached Product", "description": "Cached", "price": "10.00",
+                }
+            hits = product_cache.hits
+
+            response = await client.patch(f"/products/{product.id}", json={"price": "12.50"}, headers=headers)
+            assert response.status_code == 200
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.json()["price"] == "12.50"
+
+            await ProductService.toggle_product_status(product.id)
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 404
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 404
+            assert product_cache.hits == hits + 1
+
+            await ProductService.set_product_active_status(product.id, True)
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 200
+            response = await client.delete(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 200
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 404
+        # Очистка данных в конце теста
+        await Product.all().delete()
+
+
+# Удаление владельца удаляет его продукты из кэша получения по ID
+@pytest.mark.asyncio
+async def test_get_product_cache_follows_owner_deletion(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        seller = await User.create(name="Seller", email="seller@example.com", phone="+70000000002", password="x")
+        product = await Product.create(
+            name="Seller Product", description="Cached", price=10, is_active=True, owner=seller
+        )
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 200
+            assert product_cache.get(product.id) is not None
+
+            response = await client.delete(f"/users/{seller.id}", headers=headers)
+            assert response.status_code == 200
+            assert product_cache.get(product.id) is None
+            response = await client.get(f"/products/{product.id}", headers=headers)
+            assert response.status_code == 404
+        # Очистка данных в конце теста
+        await Product.all().delete()
+        await User.filter(email="seller@example.com").delete()
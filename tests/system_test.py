@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from tortoise import Tortoise
+from bb.core.invalidation import LISTENER_APPLICATION_NAME, invalidation_bus
+from bb.main import app
+from bb.products.services import product_cache
+from tests.conftest import TEST_DB_CONFIG
+
+
+# Метрики приложения, включая пул соединений с БД
+@pytest.mark.asyncio
+async def test_get_system_stats(test_db):
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get("/system/stats")
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["db_pool"]["initialized"] is True
+        assert stats["db_pool"]["acquires"] > 0
+        assert stats["db_pool"]["in_use"] == 0
+        assert {"queue_depth", "avg_latency_ms"} <= set(stats["password_hasher"])
+        assert {"hits", "misses"} <= set(stats["principal_cache"])
+        assert stats["token_codec"]["can_sign"] is True
+
+
+# Метрики Prometheus: задержка и запросы к БД по шаблону маршрута
+@pytest.mark.asyncio
+async def test_get_metrics(test_db, authenticated_user_token):
+    async with authenticated_user_token as headers:
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            response = await client.get("/products", headers=headers)
+            assert response.status_code == 200
+            response = await client.patch("/products/999999", json={"name": "Missing"}, headers=headers)
+            assert response.status_code == 404
+
+            # Запросы записываются в метрики через call_soon после ответа
+            await asyncio.sleep(0)
+            response = await client.get("/metrics")
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain")
+            samples = {}
+            for line in response.text.splitlines():
+                if line and not line.startswith("#"):
+                    name, value = line.rsplit(" ", 1)
+                    samples[name] = float(value)
+            assert samples['bb_http_request_duration_seconds_count{method="GET",route="/products",status="200"}'] >= 1
+            assert samples[
+                'bb_http_request_duration_seconds_count{method="PATCH",route="/products/{product_id}",status="404"}'
+            ] >= 1
+            assert samples['bb_http_request_db_queries_total{method="GET",route="/products"}'] >= 1
+            assert samples['bb_db_query_duration_seconds_count'] >= 1
+            assert samples['bb_db_pool_initialized'] == 1
+
+
+# Инвалидация кэша уведомлением другого воркера и полная очистка после переподключения слушателя
+@pytest.mark.asyncio
+async def test_cache_invalidation_bus(test_db, monkeypatch):
+    monkeypatch.setattr(invalidation_bus, "enabled", True)
+    monkeypatch.setattr(invalidation_bus, "healthcheck_interval", 0.5)
+    await invalidation_bus.start(TEST_DB_CONFIG["connections"]["default"]["credentials"])
+    try:
+        await asyncio.wait_for(invalidation_bus.connected.wait(), 5)
+        connection = Tortoise.get_connection("default")
+
+        product_cache.set(1, b"{}")
+        product_cache.set(2, b"{}")
+        # Уведомление из другого процесса: ключи приходят строками через перевод строки
+        await connection.execute_query(f"SELECT pg_notify('{invalidation_bus.channel}', 'product:1')")
+        for _ in range(50):
+            if product_cache.get(1) is None:
+                break
+            await asyncio.sleep(0.02)
+        assert product_cache.get(1) is None
+        assert product_cache.get(2) == b"{}"
+
+        # Соединение слушателя разорвано: после переподключения кэш очищается полностью
+        await connection.execute_query(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE application_name = $1",
+            [LISTENER_APPLICATION_NAME],
+        )
+        for _ in range(100):
+            if invalidation_bus.stats()["reconnects"] == 1 and invalidation_bus.connected.is_set():
+                break
+            await asyncio.sleep(0.05)
+        assert invalidation_bus.stats()["reconnects"] == 1
+        assert product_cache.get(2) is None
+    finally:
+        await invalidation_bus.stop()
@@ -1,7 +1,20 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
 import pytest
+from Crypto.PublicKey import ECC
 from httpx import AsyncClient
+from jose import JWTError
 from bb.main import app
+from bb.security.admission import auth_admission, TokenBucketLimiter
+from bb.security.models import RevokedToken
+from bb.security.passwords import PasswordHasher
+from bb.security.revocation import BloomFilter, revocation_list
+from bb.security.tokens import TokenCodec
 from bb.users.models import User
+from bb.users.services import UserService
 
 
 # Регистрация пользователя
@@ -42,7 +55,7 @@ async def test_get_all_users(test_db, register_and_authenticate_user):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         response = await client.get("/users/list", headers=headers)
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        assert isinstance(response.json()["items"], list)
         # Очистка данных в конце теста
         await User .all().delete()
 
@@ -81,4 +94,228 @@ async def test_delete_user(test_db, register_and_authenticate_user):
         assert response.status_code == 200
         assert response.json()["message"] == "User deleted successfully"
         # Очистка данных в конце теста
-        await User.filter(id=user_id).delete()
\ No newline at end of file
+        await User.filter(id=user_id).delete()
+
+
+# Токен удаленного пользователя больше не принимается, несмотря на кэш пользователей
+@pytest.mark.asyncio
+async def test_deleted_user_token_rejected(test_db, register_and_authenticate_user):
+    user_id, headers = await register_and_authenticate_user
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get("/products", headers=headers)
+        assert response.status_code == 200
+        response = await client.delete(f"/users/{user_id}", headers=headers)
+        assert response.status_code == 200
+        response = await client.get("/products", headers=headers)
+        assert response.status_code == 401
+
+
+# Постраничный и потоковый список пользователей без хэша пароля
+@pytest.mark.asyncio
+async def test_get_users_paginated_and_streamed(test_db):
+    await User.bulk_create([
+        User(name=f"List User {i}", email=f"list{i}@example.com", phone=f"+7900000000{i}", password="hash")
+        for i in range(5)
+    ])
+    expected_ids = await User.all().order_by('id').values_list('id', flat=True)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        seen_ids, params = [], {"limit": 2}
+        while True:
+            response = await client.get("/users/list", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert all("password" not in user for user in page["items"])
+            seen_ids += [user["id"] for user in page["items"]]
+            if page["next_cursor"] is None:
+                break
+            params["after"] = page["next_cursor"]
+        assert seen_ids == expected_ids
+
+        response = await client.get("/users/list", params={"stream": True})
+        assert response.status_code == 200
+        users = [json.loads(line) for line in response.text.splitlines()]
+        assert [user["id"] for user in users] == expected_ids
+        assert set(users[0]) == {"id", "name", "email", "phone", "created_at", "updated_at"}
+    # Очистка данных в конце теста
+    await User.all().delete()
+
+
+# Контроль допуска: исчерпанная корзина email и глобальный предел дают 429 с Retry-After
+@pytest.mark.asyncio
+async def test_login_admission_control(test_db, register_and_authenticate_user, monkeypatch):
+    await register_and_authenticate_user
+    credentials = {"email": "test@example.com", "password": "Password123!"}
+    monkeypatch.setattr(auth_admission, "email_limiter", TokenBucketLimiter(rate=0.01, burst=2, maxsize=10))
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        for _ in range(2):
+            response = await client.post("/users/login", json=credentials)
+            assert response.status_code == 200
+        response = await client.post("/users/login", json={**credentials, "email": "TEST@example.com"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        monkeypatch.setattr(auth_admission, "email_limiter", TokenBucketLimiter(rate=0, burst=0, maxsize=10))
+        monkeypatch.setattr(auth_admission, "max_concurrent", 1)
+        responses = await asyncio.gather(*(client.post("/users/login", json=credentials) for _ in range(3)))
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses[0] == 200 and statuses[-1] == 429
+    assert auth_admission.stats()["in_flight"] == 0
+    # Очистка данных в конце теста
+    await User.all().delete()
+
+
+# Обновление токенов по токену обновления
+@pytest.mark.asyncio
+async def test_refresh_token(test_db, register_and_authenticate_user, monkeypatch):
+    _, access_headers = await register_and_authenticate_user
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        login_response = await client.post("/users/login", json={
+            "email": "test@example.com",
+            "password": "Password123!"
+        })
+        refresh_token = login_response.json()["refresh_token"]
+
+        response = await client.post("/users/token/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200
+        assert response.json()["refresh_token"] == refresh_token
+        response = await client.get(
+            "/products", headers={"Authorization": f"Bearer {response.json()['access_token']}"}
+        )
+        assert response.status_code == 200
+
+        # Токен обновления не принимается как токен доступа, и наоборот
+        response = await client.get("/products", headers={"Authorization": f"Bearer {refresh_token}"})
+        assert response.status_code == 401
+        access_token = access_headers["Authorization"].split()[1]
+        response = await client.post("/users/token/refresh", json={"refresh_token": access_token})
+        assert response.status_code == 401
+
+        # При ротации выдается новый токен обновления, а прежний больше не принимается
+        monkeypatch.setattr("bb.users.services.REFRESH_TOKEN_ROTATION", True)
+        response = await client.post("/users/token/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200
+        rotated_token = response.json()["refresh_token"]
+        assert rotated_token != refresh_token
+        response = await client.post("/users/token/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+        response = await client.post("/users/token/refresh", json={"refresh_token": rotated_token})
+        assert response.status_code == 200
+        assert await UserService.refresh_tokens(response.json()["refresh_token"], rotate=False) is not None
+
+        # Одновременный обмен одного токена: новые токены получает только один запрос
+        refresh_token = response.json()["refresh_token"]
+        results = await asyncio.gather(*(UserService.refresh_tokens(refresh_token, rotate=True) for _ in range(5)))
+        assert sum(result is not None for result in results) == 1
+    # Очистка данных в конце теста
+    await User.all().delete()
+    await RevokedToken.all().delete()
+
+
+# Выход отзывает токены доступа и обновления, остальные токены пользователя продолжают работать
+@pytest.mark.asyncio
+async def test_logout_revokes_tokens(test_db, register_and_authenticate_user):
+    _, headers = await register_and_authenticate_user
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        login_response = await client.post("/users/login", json={
+            "email": "test@example.com",
+            "password": "Password123!"
+        })
+        tokens = login_response.json()
+        other_headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+        response = await client.post(
+            "/users/logout", json={"refresh_token": tokens["refresh_token"]}, headers=other_headers
+        )
+        assert response.status_code == 200
+        response = await client.get("/products", headers=other_headers)
+        assert response.status_code == 401
+        response = await client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == 401
+        response = await client.get("/products", headers=headers)
+        assert response.status_code == 200
+
+        # Отзыв, сделанный другим воркером, виден после загрузки списка из БД
+        revocation_list.clear()
+        before = revocation_list.stats()
+        response = await client.get("/products", headers=other_headers)
+        assert response.status_code == 401
+        stats = revocation_list.stats()
+        assert stats["entries"] == 2
+        assert stats["filter_hits"] - before["filter_hits"] == 1
+        assert stats["false_positives"] == before["false_positives"]
+    # Очистка данных в конце теста
+    await User.all().delete()
+    await RevokedToken.all().delete()
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+# Асимметричный кодек токенов: проверка без закрытого ключа и кэш проверенных токенов
+def test_token_codec_es256():
+    key = ECC.generate(curve="P-256")
+    signer = TokenCodec("ES256", signing_key=key.export_key(format="PEM"), cache_size=10, cache_ttl=60)
+    verifier = TokenCodec(
+        "ES256", verification_key=key.public_key().export_key(format="PEM"), cache_size=10, cache_ttl=60
+    )
+    token = signer.encode({"sub": "test@example.com", "exp": datetime.utcnow() + timedelta(minutes=5)})
+
+    assert verifier.decode(token)["sub"] == "test@example.com"
+    assert verifier.decode(token)["sub"] == "test@example.com"
+    assert verifier.stats()["hits"] == 1 and verifier.stats()["misses"] == 1
+    assert signer.decode(token)["sub"] == "test@example.com"
+
+    with pytest.raises(JWTError):
+        verifier.encode({"sub": "test@example.com"})
+    with pytest.raises(JWTError):
+        verifier.decode(token[:-4] + "AAAA")
+    expired = signer.encode({"sub": "test@example.com", "exp": datetime.utcnow() - timedelta(seconds=1)})
+    with pytest.raises(JWTError):
+        verifier.decode(expired)
+    assert len(verifier.cache) == 1
+
+
+# Хэширование паролей в пуле: выполнение вне цикла событий, очередь при занятом пуле и метрики
+@pytest.mark.asyncio
+async def test_password_hasher():
+    hasher = PasswordHasher(executor_type="thread", workers=1, rounds=4)
+    release = threading.Event()
+    threads = []
+
+    def blocking(value):
+        threads.append(threading.current_thread().name)
+        release.wait(5)
+        return value, 0.0
+
+    try:
+        tasks = [asyncio.create_task(hasher._run(blocking, i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert hasher.pending == 3
+        assert hasher.queue_depth == 2
+        assert hasher.stats()["queue_depth"] == 2
+        release.set()
+        assert await asyncio.gather(*tasks) == [0, 1, 2]
+        assert all(name.startswith("bcrypt") for name in threads)
+        assert threading.current_thread().name not in threads
+
+        hashed = await hasher.hash("Secret!Password1")
+        assert hashed.startswith("$2b$04$")
+        assert await hasher.verify("Secret!Password1", hashed) is True
+        assert await hasher.verify("Wrong!Password1", hashed) is False
+
+        stats = hasher.stats()
+        assert stats["operations"] == 6
+        assert stats["pending"] == 0 and stats["queue_depth"] == 0
+        assert stats["avg_wait_ms"] > 0
+        assert stats["max_latency_ms"] >= stats["avg_latency_ms"] > 0
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert hasher._executor is None